@@ -1,18 +1,26 @@
 from fastapi import FastAPI, File, UploadFile, Form, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import pandas as pd
-from io import BytesIO
+import asyncio
 import os
 from dotenv import load_dotenv
 import numpy as np  # <-- ADDED
+import re
+import ast
+import tempfile
+import threading
 
 from src.vector_manager import VectorDBManager
 from src.config import EMBED_DIM
-from src.embeddings import embed_chunks
+from src.embeddings import embed_texts_array
 from src.file_parser import parse_file
-from src.query_llm import query_llm
-from src.visualization import recommend_visualizations, detect_column_types
-import plotly.express as px
+from src.query_llm import cached_query_llm, clear_query_cache
+from src.visualization import recommend_visualizations, detect_column_types, schema_types
+from src.utils import SpillingLRUCache, safe_json_records, safe_json_records_df
+import plotly.graph_objects as go
+import plotly.io as pio
+import orjson
 from src.config import PINECONE_API_KEY as CFG_PINECONE_API_KEY, PINECONE_INDEX as CFG_PINECONE_INDEX
 
 load_dotenv()
@@ -26,28 +34,195 @@ app = FastAPI()
 app.add_middleware(
     CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]
 )
+# Plot JSON compresses well; small responses aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 vector_db = VectorDBManager(api_key=PINECONE_API_KEY, index_name=PINECONE_INDEX, dimension=EMBED_DIM)
 
-# In-memory cache for uploaded DataFrames keyed by (user_id, filename)
-DATA_CACHE = {}
+# Plot-query parsing patterns, compiled once at import
+LINE_CHART_KEYWORDS = frozenset({"line", "time series", "timeseries"})
+_X_RE = re.compile(r"x\s*[:=]\s*([a-zA-Z0-9_\- ]+)")
+_Y_RE = re.compile(r"y\s*[:=]\s*([a-zA-Z0-9_\- ]+)")
+_VS_RE = re.compile(r"([a-zA-Z0-9_\- ]+)\s*(vs|by)\s*([a-zA-Z0-9_\- ]+)")
 
+# Object columns with fewer distinct values than this fraction of rows are cached as category
+CATEGORY_MAX_RATIO = 0.5
 
-def safe_json_records(records):
-    # Returns a list of dicts with all NaN, inf, -inf replaced with None for JSON serialization.
-    safe = []
-    for row in records:
-        clean_row = {}
-        for k, v in row.items():
-            if isinstance(v, float):
-                if np.isnan(v) or np.isinf(v):
-                    clean_row[k] = None
-                else:
-                    clean_row[k] = float(v)
-            else:
-                clean_row[k] = v
-        safe.append(clean_row)
-    return safe
+# Point-per-row charts are drawn from a uniform sample above this many rows;
+# larger histograms are binned server-side into HISTOGRAM_BINS bars
+PLOT_MAX_POINTS = 50_000
+HISTOGRAM_BINS = 50
+
+# Aggregations supported by the plot builder, mapped to pandas groupby agg names
+AGG_FUNCS = {"sum": "sum", "mean": "mean", "count": "count"}
+
+# Size-bounded cache for uploaded DataFrames keyed by (user_id, filename).
+# Each entry holds the coerced DataFrame plus its column types and a lowercase
+# column lookup, so visualization requests don't re-inspect the frame.
+# Least-recently-used entries are spilled to Feather files and reloaded on demand.
+DATA_CACHE_MAXSIZE = int(os.getenv("DATA_CACHE_MAXSIZE", "32"))
+DATA_CACHE_DIR = os.getenv("DATA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "biz_analyst_cache"))
+DATA_CACHE = SpillingLRUCache(maxsize=DATA_CACHE_MAXSIZE, spill_dir=DATA_CACHE_DIR)
+_CACHE_LOCK = threading.Lock()
+
+def _coerce_numeric(df):
+    # Convert numeric-looking object columns in one apply instead of a per-column loop
+    obj_cols = df.select_dtypes(include="object").columns
+    if len(obj_cols):
+        df[obj_cols] = df[obj_cols].apply(pd.to_numeric, errors="ignore")
+    return df
+
+
+def _categorize_low_cardinality(df):
+    # Dictionary-encode repetitive label columns (Region, Category, ...) so groupby
+    # hashes small integer codes instead of every string
+    for c in df.select_dtypes(include="object").columns:
+        if df[c].nunique(dropna=True) / max(len(df), 1) < CATEGORY_MAX_RATIO:
+            df[c] = df[c].astype("category")
+    return df
+
+
+def _downcast_numeric(df):
+    # Store numbers in the smallest dtype that holds them exactly, so aggregations move fewer bytes.
+    # Floats only go to float32 when every value round-trips unchanged (pandas' downcast="float" rounds).
+    for c in df.select_dtypes(include="integer").columns:
+        df[c] = pd.to_numeric(df[c], downcast="integer")
+    for c in df.select_dtypes(include="float").columns:
+        as_f32 = df[c].astype("float32")
+        if as_f32.astype("float64").equals(df[c].astype("float64")):
+            df[c] = as_f32
+    return df
+
+
+def _store_entry(key, df):
+    cols_lower = {}
+    for c in df.columns:
+        cols_lower.setdefault(str(c).lower(), c)
+    entry = {
+        "df": df,
+        "types": detect_column_types(df),
+        "cols_lower": cols_lower,
+    }
+    with _CACHE_LOCK:
+        DATA_CACHE[key] = entry
+    # Frames evicted by the insert are written to disk after the lock is released
+    DATA_CACHE.spill_evicted()
+    return entry
+
+
+def cache_dataframe(user_id, filename, df):
+    df = _categorize_low_cardinality(df)
+    df = _downcast_numeric(df)
+    # Arrow-backed columns store strings contiguously: a fraction of the memory of
+    # object columns, and faster to hash when grouping
+    df = df.convert_dtypes(dtype_backend="pyarrow")
+    key = (user_id, filename)
+    # A re-upload replaces any evicted copy of the previous file
+    DATA_CACHE.drop_spilled(key)
+    return _store_entry(key, df)
+
+
+def get_cached_entry(user_id, file_id):
+    key = (user_id, file_id)
+    with _CACHE_LOCK:
+        entry = DATA_CACHE.get(key)
+    if entry is not None:
+        return entry
+    df = DATA_CACHE.load_spilled(key)
+    if df is not None:
+        return _store_entry(key, df)
+    # A concurrent lookup may have just reloaded it
+    with _CACHE_LOCK:
+        return DATA_CACHE.get(key)
+
+def _detect_chart(ql: str):
+    # ql is the lowercased query
+    if any(k in ql for k in LINE_CHART_KEYWORDS):
+        return "line"
+    if "scatter" in ql:
+        return "scatter"
+    if "pie" in ql:
+        return "pie"
+    if "hist" in ql:
+        return "histogram"
+    return "bar"
+
+def _parse_plot_query(q: str, cols_lower):
+    ql = (q or "").lower()
+    chart = _detect_chart(ql)
+    x = None
+    y = None
+    m = _X_RE.search(ql)
+    if m:
+        x = m.group(1).strip()
+    m = _Y_RE.search(ql)
+    if m:
+        y = m.group(1).strip()
+    if x is None and y is None:
+        m = _VS_RE.search(ql)
+        if m:
+            left, _, right = m.groups()
+            x, y = left.strip(), right.strip()
+    x = cols_lower.get(x) if x else None
+    y = cols_lower.get(y) if y else None
+    return chart, x, y
+
+def _split_columns(x):
+    # x is a column label or a comma-separated list from the plot builder
+    if not isinstance(x, str):
+        return [x]
+    if "," not in x:
+        x = x.strip()
+        return [x] if x else []
+    return [c for c in (part.strip() for part in x.split(",")) if c]
+
+def _plot_sample(df):
+    if len(df) <= PLOT_MAX_POINTS:
+        return df
+    # sort_index keeps line charts in their original row order
+    return df.sample(n=PLOT_MAX_POINTS, random_state=0).sort_index()
+
+def _xy_figure(trace, title, x_title, y_title):
+    # Traces get bare column arrays so plotly skips its DataFrame parsing and column copies
+    fig = go.Figure(trace)
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title)
+    return fig
+
+def _histogram_figure(df, col):
+    title = f"Distribution of {col}"
+    s = df[col]
+    if len(s) <= PLOT_MAX_POINTS:
+        return _xy_figure(go.Histogram(x=s.to_numpy()), title, col, "count")
+    # Ship bin counts instead of every raw value
+    if pd.api.types.is_numeric_dtype(s):
+        values = s.dropna().to_numpy(dtype="float64")
+        counts, edges = np.histogram(values[np.isfinite(values)], bins=HISTOGRAM_BINS)
+        fig = _xy_figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts), title, col, "count")
+        fig.update_layout(bargap=0)
+        return fig
+    counts = s.value_counts(sort=False, dropna=True)
+    return _xy_figure(go.Bar(x=counts.index.to_numpy(), y=counts.to_numpy()), title, col, "count")
+
+def row_to_content(row):
+    # Dict rows are stored as JSON so the RAG fallback can load them back without literal_eval
+    if isinstance(row, dict):
+        return orjson.dumps(row, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+    return str(row)
+
+def _parse_row_content(raw):
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        pass
+    # Vectors stored before rows were JSON-encoded hold Python dict reprs
+    try:
+        return ast.literal_eval(raw)
+    except Exception:
+        return None
+
+def figs_to_json(figs):
+    # orjson serializes the numpy arrays inside figures directly, far faster than the stdlib encoder
+    return [pio.to_json(fig, engine="orjson") for fig in figs]
 
 @app.get("/")
 def root():
@@ -59,69 +234,67 @@ def health():
 
 @app.post("/upload")
 async def upload(file: UploadFile = File(...), user_id: str = Form(...)):
-    contents = await file.read()
     filename = file.filename
     try:
-        parsed = parse_file(BytesIO(contents), filename=filename)
-        chunks = []
-        for i, row in enumerate(parsed):
-            chunks.append(
-                {
-                    "chunk_id": f"{filename}_chunk_{i}",
-                    "file_id": filename,
-                    "user_id": user_id,
-                    "content": str(row),
-                }
-            )
-        embedded_chunks = embed_chunks(chunks)
+        # Blocking parse/embed/cache work runs in worker threads so the event loop stays responsive.
+        # Parse straight from the spooled upload; Starlette already spills large files to disk
+        parsed = await asyncio.to_thread(parse_file, file.file, filename=filename)
+        texts = [row_to_content(row) for row in parsed]
+        # float32 (n, dim) array; Pinecone takes the numpy rows directly as vector values
+        embeddings = await asyncio.to_thread(embed_texts_array, texts)
         vectors = [
             {
-                "id": chunk["chunk_id"],
-                "values": chunk["embedding"],
+                "id": f"{filename}_chunk_{i}",
+                "values": embedding,
                 "metadata": {
-                    "content": chunk["content"],
+                    "content": text,
                     "file_id": filename,
                     "user_id": user_id,
                 },
             }
-            for chunk in embedded_chunks
+            for i, (text, embedding) in enumerate(zip(texts, embeddings))
         ]
         namespace = f"user_{user_id}_{filename}"
-        vector_db.upsert_vectors(vectors, namespace=namespace)
-
-        if filename.lower().endswith(".csv"):
-            df = pd.DataFrame(parsed)
-            # ensure numeric columns are correctly typed
-            for c in df.columns:
-                if df[c].dtype == object:
-                    coerced = pd.to_numeric(df[c], errors="ignore")
-                    df[c] = coerced
-            preview = df.head(5).to_dict(orient="records")
-            preview = safe_json_records(preview)  # <-- ENSURE JSON SAFETY
-            columns = df.columns.tolist()
-            DATA_CACHE[(user_id, filename)] = df
-        else:
-            if isinstance(parsed, list) and parsed and isinstance(parsed[0], dict):
-                df = pd.DataFrame(parsed)
-                for c in df.columns:
-                    if df[c].dtype == object:
-                        df[c] = pd.to_numeric(df[c], errors="ignore")
-                preview = df.head(5).to_dict(orient="records")
-                preview = safe_json_records(preview)  # <-- ENSURE JSON SAFETY
+        # Upserts run in the background while the DataFrame preview/cache is built below
+        upserts = vector_db.upsert_vectors_async(vectors, namespace=namespace, batch_size=100)
+
+        try:
+            if filename.lower().endswith(".csv"):
+                # ensure numeric columns are correctly typed
+                df = _coerce_numeric(pd.DataFrame(parsed))
+                preview = safe_json_records_df(df.head(5))  # <-- ENSURE JSON SAFETY
                 columns = df.columns.tolist()
-                DATA_CACHE[(user_id, filename)] = df
+                entry = await asyncio.to_thread(cache_dataframe, user_id, filename, df)
+                types = schema_types(entry["df"], entry["types"])
             else:
-                preview = parsed[:5]
-                # Replace any nan, inf in text fallback too!
-                preview = [
-                    (p if isinstance(p, dict) else {"text": str(p)}) for p in preview
-                ]
-                preview = safe_json_records(preview)
-                columns = []
+                if isinstance(parsed, list) and parsed and isinstance(parsed[0], dict):
+                    df = _coerce_numeric(pd.DataFrame(parsed))
+                    preview = safe_json_records_df(df.head(5))  # <-- ENSURE JSON SAFETY
+                    columns = df.columns.tolist()
+                    entry = await asyncio.to_thread(cache_dataframe, user_id, filename, df)
+                    types = schema_types(entry["df"], entry["types"])
+                else:
+                    preview = parsed[:5]
+                    # Replace any nan, inf in text fallback too!
+                    preview = [
+                        (p if isinstance(p, dict) else {"text": str(p)}) for p in preview
+                    ]
+                    preview = safe_json_records(preview)
+                    columns = []
+                    types = {}
+        finally:
+            # Always wait for the upserts, so a failed batch is reported instead of lost in the
+            # background, and drop cached answers for the namespace even if the preview failed
+            try:
+                await asyncio.gather(*(asyncio.wrap_future(f) for f in upserts))
+            finally:
+                clear_query_cache(namespace)
 
         return {
             "filename": filename,
             "columns": columns,
+            # Same shape as /schema, so clients don't need a second round-trip after uploading
+            "types": types,
             "preview": preview,
             "message": "File uploaded and vectors stored successfully",
         }
@@ -129,30 +302,23 @@ async def upload(file: UploadFile = File(...), user_id: str = Form(...)):
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @app.post("/query")
-def query_text(
+async def query_text(
     user_query: str = Query(...),
     user_id: str = Query(...),
     file_id: str = Query(...)
 ):
     namespace = f"user_{user_id}_{file_id}"
-    result = query_llm(user_query, namespace=namespace)
+    # On a cache miss this blocks on the embedding, vector and LLM APIs; keep it off the event loop
+    result = await asyncio.to_thread(cached_query_llm, user_query, namespace=namespace, db=vector_db)
     return result
 
 @app.get("/schema")
 def get_schema(user_id: str = Query(...), file_id: str = Query(...)):
-    df = DATA_CACHE.get((user_id, file_id))
+    entry = get_cached_entry(user_id, file_id)
+    df = entry["df"] if entry else None
     if df is None or df.empty:
         return {"columns": [], "types": {}}
-    types = {}
-    for c in df.columns:
-        if pd.api.types.is_numeric_dtype(df[c]):
-            t = "numeric"
-        elif pd.api.types.is_datetime64_any_dtype(df[c]):
-            t = "datetime"
-        else:
-            t = "categorical"
-        types[c] = t
-    return {"columns": list(df.columns), "types": types}
+    return {"columns": list(df.columns), "types": schema_types(df, entry["types"])}
 
 @app.post("/visualize_by_query")
 def visualize_by_query(
@@ -163,129 +329,106 @@ def visualize_by_query(
     y: str | None = Form(None),
     aggregate: str | None = Form(None)
 ):
-    df = DATA_CACHE.get((user_id, file_id))
-    def _parse_plot_query(q: str, df_cols):
-        ql = (q or "").lower()
-        chart = "bar"
-        if any(k in ql for k in ["line", "time series", "timeseries"]):
-            chart = "line"
-        elif "scatter" in ql:
-            chart = "scatter"
-        elif "pie" in ql:
-            chart = "pie"
-        elif "hist" in ql:
-            chart = "histogram"
-        import re
-        x = None
-        y = None
-        m = re.search(r"x\s*[:=]\s*([a-zA-Z0-9_\- ]+)", ql)
-        if m:
-            x = m.group(1).strip()
-        m = re.search(r"y\s*[:=]\s*([a-zA-Z0-9_\- ]+)", ql)
-        if m:
-            y = m.group(1).strip()
-        if x is None and y is None:
-            m = re.search(r"([a-zA-Z0-9_\- ]+)\s*(vs|by)\s*([a-zA-Z0-9_\- ]+)", ql)
-            if m:
-                left, _, right = m.groups()
-                x, y = left.strip(), right.strip()
-        def _resolve(name):
-            if not name:
-                return None
-            for c in df_cols:
-                if c.lower() == name.lower():
-                    return c
-            return None
-        x = _resolve(x)
-        y = _resolve(y)
-        return chart, x, y
-
+    entry = get_cached_entry(user_id, file_id)
+    df = entry["df"] if entry else None
     if df is not None and not df.empty:
-        for c in df.columns:
-            if df[c].dtype == object:
-                df[c] = pd.to_numeric(df[c], errors="ignore")
-        types = detect_column_types(df)
+        types = entry["types"]
         if not x and not y:
-            chart, x, y = _parse_plot_query(visualization_query, df.columns)
+            chart, x, y = _parse_plot_query(visualization_query, entry["cols_lower"])
         else:
-            chart, _, _ = _parse_plot_query(visualization_query, df.columns)
+            # Columns are given explicitly; only the chart type comes from the query
+            chart = _detect_chart((visualization_query or "").lower())
         if x is None:
             x = (types["categorical"][0] if types["categorical"] else
                  types["datetime"][0] if types["datetime"] else df.columns[0])
         if y is None:
             y = (types["numerical"][0] if types["numerical"] else None)
 
-        x_list = [c.strip() for c in (x.split(",") if isinstance(x, str) else [x]) if c]
+        x_list = _split_columns(x)
         for xv in x_list:
             if xv not in df.columns:
                 return {"plots": [], "error": f"Column not found for x: {xv}"}
         if y and y not in df.columns:
             return {"plots": [], "error": f"Column not found for y: {y}"}
         agg_fn = (aggregate or "sum").lower()
-        if agg_fn not in ("sum", "mean", "count"):
+        if agg_fn not in AGG_FUNCS:
             agg_fn = "sum"
         figs = []
         if chart == "line" and y and x_list:
+            plot_df = _plot_sample(df[list(dict.fromkeys([*x_list, y]))])
+            y_values = plot_df[y].to_numpy()
             for xv in x_list:
-                figs.append(px.line(df, x=xv, y=y, title=f"{y} over {xv}"))
+                trace = go.Scatter(x=plot_df[xv].to_numpy(), y=y_values, mode="lines")
+                figs.append(_xy_figure(trace, f"{y} over {xv}", xv, y))
         elif chart == "scatter" and y and x_list:
+            plot_df = _plot_sample(df[list(dict.fromkeys([*x_list, y]))])
+            y_values = plot_df[y].to_numpy()
             for xv in x_list:
-                figs.append(px.scatter(df, x=xv, y=y, title=f"{y} vs {xv}"))
+                trace = go.Scatter(x=plot_df[xv].to_numpy(), y=y_values, mode="markers")
+                figs.append(_xy_figure(trace, f"{y} vs {xv}", xv, y))
         elif chart == "pie" and y and x_list:
             xv = x_list[0]
             if y == xv:
                 # Avoid duplicate column name on reset_index; use counts
-                agg_df = df.groupby(xv).size().reset_index(name="count")
-                figs.append(px.pie(agg_df, names=xv, values="count", title=f"count by {xv}"))
+                agg_df = df.groupby(xv, sort=False, observed=True).size().reset_index(name="count")
+                pie = go.Pie(labels=agg_df[xv].to_numpy(), values=agg_df["count"].to_numpy())
+                figs.append(go.Figure(pie, layout={"title": f"count by {xv}"}))
             else:
-                grouped = df.groupby(xv)[y]
-                if agg_fn == "mean":
-                    agg_df = grouped.mean().reset_index()
-                elif agg_fn == "count":
-                    agg_df = grouped.count().reset_index()
-                else:
-                    agg_df = grouped.sum().reset_index()
-                figs.append(px.pie(agg_df, names=xv, values=y, title=f"{y} by {xv}"))
+                agg_df = df.groupby(xv, sort=False, observed=True, as_index=False).agg({y: AGG_FUNCS[agg_fn]})
+                pie = go.Pie(labels=agg_df[xv].to_numpy(), values=agg_df[y].to_numpy())
+                figs.append(go.Figure(pie, layout={"title": f"{y} by {xv}"}))
         elif chart == "histogram" and (y or x):
             col = y or x_list[0]
-            figs.append(px.histogram(df, x=col, title=f"Distribution of {col}"))
+            figs.append(_histogram_figure(df, col))
         elif y and x_list:
             xv = x_list[0]
             if y == xv:
                 # Grouping and aggregating the same column causes a name clash; use counts
-                agg_df = df.groupby(xv).size().reset_index(name="count")
-                figs.append(px.bar(agg_df, x=xv, y="count", title=f"count by {xv}"))
+                agg_df = df.groupby(xv, sort=False, observed=True).size().reset_index(name="count")
+                trace = go.Bar(x=agg_df[xv].to_numpy(), y=agg_df["count"].to_numpy())
+                figs.append(_xy_figure(trace, f"count by {xv}", xv, "count"))
             else:
-                grouped = df.groupby(xv)[y]
-                if agg_fn == "mean":
-                    agg_df = grouped.mean().reset_index()
-                elif agg_fn == "count":
-                    agg_df = grouped.count().reset_index()
-                else:
-                    agg_df = grouped.sum().reset_index()
-                figs.append(px.bar(agg_df, x=xv, y=y, title=f"{y} by {xv}"))
+                agg_df = df.groupby(xv, sort=False, observed=True, as_index=False).agg({y: AGG_FUNCS[agg_fn]})
+                trace = go.Bar(x=agg_df[xv].to_numpy(), y=agg_df[y].to_numpy())
+                figs.append(_xy_figure(trace, f"{y} by {xv}", xv, y))
         else:
             figs = recommend_visualizations(df)
         try:
-            # JSON safety: nothing to do here—plot.to_json() is always safe
-            return {"plots": [fig.to_json() for fig in figs]}
+            # JSON safety: nothing to do here—plotly's JSON encoding is always safe
+            return {"plots": figs_to_json(figs)}
         except Exception as e:
             return {"plots": [], "error": f"Plot rendering failed: {str(e)}"}
 
     # Fallback to RAG-derived small dataset
     namespace = f"user_{user_id}_{file_id}"
     full_query = f"{visualization_query}\nData source: {file_id}"
-    llm_result = query_llm(full_query, namespace=namespace)
-    import ast
+    llm_result = cached_query_llm(full_query, namespace=namespace, db=vector_db)
     items = []
     for src in llm_result.get("resolved_sources", []):
         raw = src.get("raw") or src.get("snippet") or ""
-        try:
-            parsed = ast.literal_eval(raw) if isinstance(raw, str) else raw
-            if isinstance(parsed, dict):
-                items.append(parsed)
-        except Exception:
-            continue
+        parsed = _parse_row_content(raw) if isinstance(raw, str) else raw
+        if isinstance(parsed, dict):
+            items.append(parsed)
     df_fb = pd.DataFrame(items) if items else pd.DataFrame()
     figs = recommend_visualizations(df_fb)
-    return {"plots": [fig.to_json() for fig in figs]}
\ No newline at end of file
+    return {"plots": figs_to_json(figs)}
+
+@app.post("/analyze")
+async def analyze(
+    user_id: str = Form(...),
+    file_id: str = Form(...),
+    summary_query: str = Form(...),
+    visualization_query: str = Form(...),
+    want: list[str] = Form(["summary", "auto_plots"]),
+):
+    # Overview answer and automatic plots in one round-trip; both halves run concurrently
+    namespace = f"user_{user_id}_{file_id}"
+    jobs = {}
+    if "summary" in want:
+        jobs["summary"] = asyncio.to_thread(cached_query_llm, summary_query, namespace=namespace, db=vector_db)
+    if "auto_plots" in want:
+        jobs["auto_plots"] = asyncio.to_thread(
+            visualize_by_query, user_id, file_id, visualization_query, None, None, None
+        )
+    results = await asyncio.gather(*jobs.values())
+    return dict(zip(jobs, results))
@@ -1,55 +1,173 @@
 import streamlit as st
-import requests
-import plotly.io as pio
+import httpx
+import orjson
+import pandas as pd
 from pathlib import Path
 import os
+import asyncio
+import hashlib
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Get API URL from environment variable or default to localhost
 API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
 
+@st.cache_resource
+def get_client():
+    # One pooled keep-alive client per process, so reruns reuse connections to the backend.
+    # HTTP/2 is negotiated over TLS; a plain-http backend stays on HTTP/1.1 keep-alive.
+    return httpx.Client(
+        base_url=API_URL,
+        http2=True,
+        timeout=httpx.Timeout(300.0, connect=10.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+
+CLIENT = get_client()
+
+PLOT_LAYOUT = dict(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    font=dict(family="Inter, sans-serif", size=12),
+    title_font=dict(size=16, color='#1f2937'),
+    margin=dict(l=20, r=20, t=40, b=20)
+)
+PLOT_STYLES = {
+    "auto": PLOT_LAYOUT,
+    "custom": dict(
+        PLOT_LAYOUT,
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    ),
+}
+
+# cache_resource hands back the same Figure, so reruns skip both the JSON parse and the styling pass.
+# Callers must not mutate the returned figure.
+@st.cache_resource(max_entries=64, show_spinner=False)
+def styled_figure(plot_json, style):
+    # plotly is only imported once there is a figure to draw, keeping it off the landing page's cold start
+    import plotly.io as pio
+    fig = pio.from_json(plot_json)
+    fig.update_layout(**PLOT_STYLES[style])
+    return fig
+
+OVERVIEW_QUERY = "Give me a comprehensive overview of this dataset, including key insights, patterns, and recommendations"
+AUTO_PLOTS_QUERY = "Show the most important trends, distributions, and key insights in my data with professional visualizations"
+
+def backend_json(resp):
+    # Error responses raise instead of returning, so st.cache_data never stores them
+    resp.raise_for_status()
+    # orjson parses the multi-KB plot payloads several times faster than the stdlib decoder
+    return orjson.loads(resp.content)
+
+# Backend answers are deterministic per uploaded file, so reruns read them from cache.
+# file_hash (a digest of the uploaded bytes) keeps a re-uploaded file with the same name from hitting stale entries.
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_schema(user_id, file_id, file_hash):
+    return backend_json(CLIENT.get(
+        "/schema",
+        params={"user_id": user_id, "file_id": file_id},
+        timeout=10,
+    ))
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_answer(user_id, file_id, file_hash, user_query):
+    return backend_json(CLIENT.post(
+        "/query",
+        params={"user_query": user_query, "user_id": user_id, "file_id": file_id}
+    ))
+
+# Overview answer and automatic plots come back from a single /analyze round-trip
+@st.cache_data(ttl=1800, show_spinner=False)
+def fetch_analysis(user_id, file_id, file_hash):
+    return backend_json(CLIENT.post(
+        "/analyze",
+        data={
+            "user_id": user_id,
+            "file_id": file_id,
+            "summary_query": OVERVIEW_QUERY,
+            "visualization_query": AUTO_PLOTS_QUERY,
+            "want": ["summary", "auto_plots"],
+        },
+    ))
+
+def with_script_ctx(fn, ctx):
+    # st.cache_data needs the session's ScriptRunContext, which worker threads don't inherit
+    def run(*args):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+    return run
+
+async def run_concurrently(calls):
+    # The cached fetchers block, so each runs in a worker thread; one event loop overlaps their network waits.
+    # Exceptions are returned in place so one failed call doesn't discard the others' results.
+    ctx = get_script_run_ctx()
+    return await asyncio.gather(
+        *(asyncio.to_thread(with_script_ctx(fn, ctx), *args) for fn, args in calls),
+        return_exceptions=True,
+    )
+
+def remember_question():
+    # Runs before the rerun, so the fetch phase at the top of the script already sees the new question
+    if st.session_state.get("user_query"):
+        st.session_state["asked_query"] = st.session_state["user_query"]
+
+PREVIEW_ROWS = 50
+
+@st.cache_data(show_spinner=False)
+def preview_df(preview_records):
+    # Build the columnar frame once per preview and cap it, so reruns don't re-convert the records
+    return pd.DataFrame(preview_records).head(PREVIEW_ROWS)
+
+FALLBACK_CSS = """
+.main-header {
+    text-align: center;
+    padding: 2rem 0;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    border-radius: 12px;
+    margin-bottom: 2rem;
+    box-shadow: 0 4px 20px rgba(0,0,0,0.15);
+}
+.data-card {
+    background: white;
+    border-radius: 12px;
+    padding: 1.5rem;
+    margin: 1rem 0;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+    border: 1px solid rgba(0,0,0,0.05);
+}
+.stButton > button {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    border: none;
+    border-radius: 12px;
+    padding: 0.4rem 0.7rem;
+    font-weight: 600;
+    font-size: 1.2rem;
+    transition: all 0.3s ease;
+    line-height: 1;
+    cursor: pointer;
+}
+.stButton > button:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 4px 20px rgba(0,0,0,0.15);
+}
+"""
+
+@st.cache_resource
 def load_custom_css():
+    # Read once per process; reruns (every widget change) reuse the string
     css_file = Path("app/static/style.css")
     if css_file.exists():
-        with open(css_file, "r") as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-    else:
-        st.markdown("""
-        <style>
-        .main-header {
-            text-align: center;
-            padding: 2rem 0;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border-radius: 12px;
-            margin-bottom: 2rem;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.15);
-        }
-        .data-card {
-            background: white;
-            border-radius: 12px;
-            padding: 1.5rem;
-            margin: 1rem 0;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            border: 1px solid rgba(0,0,0,0.05);
-        }
-        .stButton > button {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            border-radius: 12px;
-            padding: 0.4rem 0.7rem;
-            font-weight: 600;
-            font-size: 1.2rem;
-            transition: all 0.3s ease;
-            line-height: 1;
-            cursor: pointer;
-        }
-        .stButton > button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 4px 20px rgba(0,0,0,0.15);
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        return css_file.read_text()
+    return FALLBACK_CSS
 
 st.set_page_config(
     page_title="DataInsight Pro",
@@ -58,7 +176,7 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-load_custom_css()
+st.markdown(f"<style>{load_custom_css()}</style>", unsafe_allow_html=True)
 
 # Sidebar toggle state
 if 'sidebar_collapsed' not in st.session_state:
@@ -129,6 +247,7 @@ tab1, tab2, tab3, tab4 = st.tabs(
 )
 
 file_id = None
+file_hash = None
 data_preview = None
 columns = []
 upload_error = None
@@ -137,21 +256,60 @@ user_id = st.session_state.get('user_id', None)
 uploaded_file = st.session_state.get('file_uploader', None)
 
 if uploaded_file and user_id:
+    file_hash = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    upload_key = (user_id, file_hash)
+
+if uploaded_file and user_id and st.session_state.get("last_upload_key") == upload_key:
+    # Same bytes for the same user: reuse the earlier upload instead of re-parsing and re-embedding
+    file_id = st.session_state["uploaded_file_id"]
+    data_preview = st.session_state["uploaded_preview"]
+    columns = st.session_state["uploaded_columns"]
+elif uploaded_file and user_id:
     with st.spinner("Uploading and analyzing your file..."):
-        files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
-        data = {"user_id": user_id}
         try:
-            resp = requests.post(f"{API_URL}/upload", files=files, data=data)
-            upload_result = resp.json()
+            # httpx streams multipart file parts from the handle instead of building the body in memory
+            uploaded_file.seek(0)
+            resp = CLIENT.post(
+                "/upload",
+                files={"file": (uploaded_file.name, uploaded_file, uploaded_file.type)},
+                data={"user_id": user_id},
+            )
+            upload_result = backend_json(resp)
             file_id = upload_result.get("filename", uploaded_file.name)
             data_preview = upload_result.get("preview", [])
             columns = upload_result.get("columns", [])
+            # /upload returns the typed schema; only ask /schema if it is missing
+            if "types" in upload_result:
+                st.session_state["schema"] = {"columns": columns, "types": upload_result["types"]}
+            else:
+                st.session_state["schema"] = fetch_schema(user_id, file_id, file_hash)
             st.session_state["uploaded_columns"] = columns
             st.session_state["uploaded_file_id"] = file_id
             st.session_state["uploaded_user_id"] = user_id
+            st.session_state["uploaded_preview"] = data_preview
+            # Recorded last, so a failed upload is retried on the next rerun
+            st.session_state["last_upload_key"] = upload_key
         except Exception as e:
             upload_error = str(e)
 
+# All backend reads happen here, concurrently, before any tab renders
+analysis = analysis_error = None
+asked_query = st.session_state.get("asked_query")
+answer_result = answer_error = None
+if file_id:
+    calls = [(fetch_analysis, (user_id, file_id, file_hash))]
+    if asked_query:
+        calls.append((fetch_answer, (user_id, file_id, file_hash, asked_query)))
+    with st.spinner("🧠 AI is analyzing your data..."):
+        results = asyncio.run(run_concurrently(calls))
+    analysis = results[0]
+    if isinstance(analysis, Exception):
+        analysis, analysis_error = None, analysis
+    if asked_query:
+        answer_result = results[1]
+        if isinstance(answer_result, Exception):
+            answer_result, answer_error = None, answer_result
+
 with tab1:
     st.markdown("""
     <div class="data-card fade-in">
@@ -173,14 +331,10 @@ with tab1:
             <h3 style="color: var(--text-primary); margin-bottom: 1rem;">📋 Data Preview</h3>
         </div>
         """, unsafe_allow_html=True)
-        st.dataframe(data_preview, width='stretch')
+        st.dataframe(preview_df(data_preview), width='stretch')
 
         try:
-            sch = requests.get(
-                f"{API_URL}/schema",
-                params={"user_id": user_id, "file_id": file_id},
-                timeout=10,
-            ).json()
+            sch = st.session_state.get("schema", {})
             columns = sch.get("columns", columns)
             st.session_state["uploaded_columns"] = columns
 
@@ -216,15 +370,9 @@ with tab1:
     if file_id:
         with st.spinner("🧠 AI is analyzing your data..."):
             try:
-                summary_resp = requests.post(
-                    f"{API_URL}/query",
-                    params={
-                        "user_query": "Give me a comprehensive overview of this dataset, including key insights, patterns, and recommendations",
-                        "user_id": user_id,
-                        "file_id": file_id
-                    }
-                )
-                summary = summary_resp.json().get("answer", "No summary returned.")
+                if analysis_error:
+                    raise analysis_error
+                summary = analysis["summary"].get("answer", "No summary returned.")
                 st.markdown(f"""
                 <div class="data-card" style="background: linear-gradient(135deg, rgba(99, 102, 241, 0.05) 0%, rgba(139, 92, 246, 0.05) 100%);">
                     <div style="color: var(--text-primary); line-height: 1.6;">
@@ -248,15 +396,9 @@ with tab2:
     if file_id:
         with st.spinner("🔍 Analyzing patterns and generating insights..."):
             try:
-                plot_resp = requests.post(
-                    f"{API_URL}/visualize_by_query",
-                    data={
-                        "user_id": user_id,
-                        "file_id": file_id,
-                        "visualization_query": "Show the most important trends, distributions, and key insights in my data with professional visualizations"
-                    },
-                )
-                plot_jsons = plot_resp.json().get("plots", [])
+                if analysis_error:
+                    raise analysis_error
+                plot_jsons = analysis["auto_plots"].get("plots", [])
                 if plot_jsons:
                     st.markdown("""
                     <div class="data-card">
@@ -265,14 +407,7 @@ with tab2:
                     """, unsafe_allow_html=True)
 
                     for i, plot_json in enumerate(plot_jsons):
-                        fig = pio.from_json(plot_json)
-                        fig.update_layout(
-                            plot_bgcolor='rgba(0,0,0,0)',
-                            paper_bgcolor='rgba(0,0,0,0)',
-                            font=dict(family="Inter, sans-serif", size=12),
-                            title_font=dict(size=16, color='#1f2937'),
-                            margin=dict(l=20, r=20, t=40, b=20)
-                        )
+                        fig = styled_figure(plot_json, "auto")
                         st.plotly_chart(fig, width='stretch', key=f"auto_plot_{i}")
                 else:
                     st.info("📊 No automatic insights available for this dataset.")
@@ -310,22 +445,24 @@ with tab3:
         </div>
         """, unsafe_allow_html=True)
 
-        user_query = st.text_area(
-            "💬 Ask your question", 
-            placeholder="e.g., What are the key patterns in my data?",
-            key="user_query",
-            height=100,
-            help="Ask any question about your uploaded data"
-        )
+        # A form defers the rerun until submit, so typing doesn't fire a /query per keystroke
+        with st.form("ask_form"):
+            st.text_area(
+                "💬 Ask your question", 
+                placeholder="e.g., What are the key patterns in my data?",
+                key="user_query",
+                height=100,
+                help="Ask any question about your uploaded data"
+            )
+            st.form_submit_button("Ask", on_click=remember_question)
 
-        if user_query:
+        # The last submitted question's answer was fetched above and stays on screen across unrelated reruns
+        if asked_query:
             with st.spinner("🧠 AI is thinking..."):
                 try:
-                    response = requests.post(
-                        f"{API_URL}/query",
-                        params={"user_query": user_query, "user_id": user_id, "file_id": file_id}
-                    )
-                    answer = response.json().get("answer", "No response available.")
+                    if answer_error:
+                        raise answer_error
+                    answer = answer_result.get("answer", "No response available.")
                     st.markdown(f"""
                     <div class="data-card" style="background: linear-gradient(135deg, rgba(16, 185, 129, 0.05) 0%, rgba(34, 197, 94, 0.05) 100%);">
                         <h4 style="color: var(--success-color); margin-bottom: 1rem;">🤖 AI Response</h4>
@@ -402,18 +539,18 @@ with tab4:
 
             with st.spinner("🎨 Creating your visualization..."):
                 try:
-                    resp = requests.post(
-                        f"{API_URL}/visualize_by_query",
-                        data={
-                            "user_id": uid,
-                            "file_id": fid,
-                            "visualization_query": built_query,
-                            "x": ",".join(x_cols),
-                            "y": y_col,
-                            "aggregate": None if agg == "none" else agg,
-                        }
-                    )
-                    bjson = resp.json()
+                    builder_data = {
+                        "user_id": uid,
+                        "file_id": fid,
+                        "visualization_query": built_query,
+                        "x": ",".join(x_cols),
+                        "y": y_col,
+                    }
+                    # httpx would send None as an empty field; leave it out like requests did
+                    if agg != "none":
+                        builder_data["aggregate"] = agg
+                    resp = CLIENT.post("/visualize_by_query", data=builder_data)
+                    bjson = backend_json(resp)
                     plot_jsons = bjson.get("plots", [])
                     if plot_jsons:
                         st.markdown("""
@@ -423,22 +560,7 @@ with tab4:
                         """, unsafe_allow_html=True)
 
                         for i, plot_json in enumerate(plot_jsons):
-                            fig = pio.from_json(plot_json)
-                            fig.update_layout(
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                paper_bgcolor='rgba(0,0,0,0)',
-                                font=dict(family="Inter, sans-serif", size=12),
-                                title_font=dict(size=16, color='#1f2937'),
-                                margin=dict(l=20, r=20, t=40, b=20),
-                                showlegend=True,
-                                legend=dict(
-                                    orientation="h",
-                                    yanchor="bottom",
-                                    y=1.02,
-                                    xanchor="right",
-                                    x=1
-                                )
-                            )
+                            fig = styled_figure(plot_json, "custom")
                             st.plotly_chart(fig, width='stretch', key=f"custom_plot_{i}")
                     else:
                         st.info("📊 No visualization could be created with the selected parameters.")
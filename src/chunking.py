@@ -1,22 +1,90 @@
 # src/chunking.py
 
 import io
+import os
+import re
 import csv
+import threading
+import numpy as np
+
+# Must be set before transformers loads: lets the Rust tokenizer encode batches across threads
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+# Keep hub telemetry, advisory warnings and download progress bars out of worker startup
+os.environ.setdefault("HF_HUB_DISABLE_TELEMETRY", "1")
+os.environ.setdefault("HF_HUB_DISABLE_PROGRESS_BARS", "1")
+os.environ.setdefault("TRANSFORMERS_NO_ADVISORY_WARNINGS", "1")
+
 from transformers import AutoTokenizer
-from src.config import CHUNK_OVERLAP
+from src.config import CHUNK_OVERLAP, CHAR_PER_TOKEN
+
+
+TOKENIZER_NAME = "bert-base-uncased"
+
+# HuggingFace lightweight tokenizer (local + deployable), loaded on first use
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """
+    Shared tokenizer instance. Loading is deferred so importing this module (and starting
+    a worker) doesn't pay for it; use_fast pins the Rust implementation.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                tok = AutoTokenizer.from_pretrained(TOKENIZER_NAME, use_fast=True)
+                # The first batch encode spins up the Rust thread pool; pay for it here, once
+                tok(["warmup", "warmup"], add_special_tokens=False)
+                _tokenizer = tok
+    return _tokenizer
+
+
+def _prewarm_tokenizer():
+    try:
+        get_tokenizer()
+    except Exception:
+        pass  # e.g. offline; the first real call loads (and raises) instead
+
 
+# Load and warm the tokenizer in the background so neither import nor the first
+# chunking call waits on it; a caller arriving early blocks on the lock, not a second load
+threading.Thread(target=_prewarm_tokenizer, name="tokenizer-prewarm", daemon=True).start()
 
-# HuggingFace lightweight tokenizer (local + deployable)
-tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
 
 def num_tokens_from_string(text: str) -> int:
     """
     Count number of tokens in a string using HuggingFace tokenizer.
     """
-    tokens = tokenizer.encode(text, add_special_tokens=False)
+    tokens = get_tokenizer().encode(text, add_special_tokens=False)
     return len(tokens)
 
 
+# Rows tokenized per CSV to calibrate the characters-per-token estimate
+CSV_CALIBRATION_ROWS = 32
+# Approximate token budget per CSV chunk
+CSV_CHUNK_TOKENS = 500
+
+# Texts estimated above this many tokens are chunked by sentence instead of token-by-token
+LONG_TEXT_TOKENS = 50000
+# Sentences tokenized per batch when counting tokens for long texts
+SENTENCE_BATCH_SIZE = 2048
+# Sentence ends (., ! or ? followed by whitespace) and blank-line paragraph breaks
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def cell_token_lengths(cells):
+    """
+    Map each distinct cell value to its token count, tokenizing them in one batch.
+    """
+    distinct = list(dict.fromkeys(cells))
+    if not distinct:
+        return {}
+    counts = [len(ids) for ids in get_tokenizer()(distinct, add_special_tokens=False)["input_ids"]]
+    return dict(zip(distinct, counts))
+
+
 def calculate_chunk_params(total_tokens: int):
     """
     Dynamically adjust chunk_size based on file size.
@@ -32,13 +100,89 @@ def calculate_chunk_params(total_tokens: int):
     return chunk_size, overlap
 
 
+def _sentence_units(text: str):
+    """
+    Split text into sentence spans with exact token counts, as (char_start, char_end, tokens).
+    BERT pre-splits on whitespace, so counting sentences separately matches counting the
+    whole text; only per-sentence counts are kept, never the full list of token ids.
+    """
+    spans = []
+    start = 0
+    for m in _SENTENCE_BREAK.finditer(text):
+        spans.append((start, m.start()))
+        start = m.end()
+    spans.append((start, len(text)))
+
+    tokenizer = get_tokenizer()
+    counts = []
+    for i in range(0, len(spans), SENTENCE_BATCH_SIZE):
+        batch = [text[s:e] for s, e in spans[i:i + SENTENCE_BATCH_SIZE]]
+        counts.extend(len(ids) for ids in tokenizer(batch, add_special_tokens=False)["input_ids"])
+    return [(s, e, n) for (s, e), n in zip(spans, counts) if n]
+
+
+def _split_long_units(text: str, units, chunk_size: int):
+    """Cut sentences longer than chunk_size into chunk_size-token pieces at token offsets."""
+    out = []
+    for s, e, n in units:
+        if n <= chunk_size:
+            out.append((s, e, n))
+            continue
+        offsets = get_tokenizer()(text[s:e], add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        for k in range(0, len(offsets), chunk_size):
+            piece = offsets[k:k + chunk_size]
+            out.append((s + piece[0][0], s + piece[-1][1], len(piece)))
+    return out
+
+
+def sentence_window_chunk(text: str):
+    """
+    Rolling window chunking for long texts that packs whole sentences instead of tokens.
+    Chunks hold up to chunk_size tokens and repeat up to `overlap` tokens of trailing
+    sentences from the previous chunk. Output matches rolling_window_chunk's shape.
+    """
+    units = _sentence_units(text)
+    chunk_size, overlap = calculate_chunk_params(sum(n for _, _, n in units))
+    units = _split_long_units(text, units, chunk_size)
+    if not units:
+        return []
+
+    tokens = np.array([n for _, _, n in units], dtype=np.int64)
+    cumulative = np.concatenate(([0], np.cumsum(tokens)))
+
+    chunks = []
+    start = 0
+    while True:
+        # Greedy: take sentences while the chunk fits, always at least one
+        end = max(int(np.searchsorted(cumulative, cumulative[start] + chunk_size, side="right")) - 1, start + 1)
+        chunks.append({
+            "chunk_id": len(chunks),
+            "content": text[units[start][0]:units[end - 1][1]],
+            "start_token": int(cumulative[start]),
+            "end_token": int(cumulative[end])
+        })
+        if end == len(units):
+            return chunks
+        # Next chunk restarts at the trailing sentences that fit in the overlap budget
+        next_start = end
+        while next_start - 1 > start and cumulative[end] - cumulative[next_start - 1] <= overlap:
+            next_start -= 1
+        start = next_start
+
+
 def rolling_window_chunk(text: str):
     """
     Rolling window based smart chunking for text (PDF, Word, TXT).
     Maintains semantic continuity with overlap.
+    Very long texts are handed to sentence_window_chunk.
     """
-    tokens = tokenizer.encode(text, add_special_tokens=False)
-    total_tokens = len(tokens)
+    if len(text) / CHAR_PER_TOKEN > LONG_TEXT_TOKENS:
+        return sentence_window_chunk(text)
+
+    # Character offsets of every token, so each window is a slice of the original text
+    # (exact whitespace/casing, no per-window decode)
+    offsets = get_tokenizer()(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    total_tokens = len(offsets)
 
     chunk_size, overlap = calculate_chunk_params(total_tokens)
 
@@ -48,8 +192,7 @@ def rolling_window_chunk(text: str):
 
     while start < total_tokens:
         end = min(start + chunk_size, total_tokens)
-        chunk_tokens = tokens[start:end]
-        chunk_text = tokenizer.decode(chunk_tokens)
+        chunk_text = text[offsets[start][0]:offsets[end - 1][1]]
 
         chunks.append({
             "chunk_id": chunk_id,
@@ -72,32 +215,33 @@ def csv_chunker(file_obj):
     reader = csv.reader(io.TextIOWrapper(file_obj, encoding="utf-8"))
 
     header = next(reader)  # keep header for context
-    chunks = []
-    current_chunk = []
-    current_tokens = 0
-    chunk_id = 0
-
-    for row in reader:
-        row_text = ", ".join(row)
-        row_tokens = num_tokens_from_string(row_text)
+    rows = list(reader)
+    row_texts = [", ".join(row) for row in rows]
+    # The 500-token budget is approximate, so rows are sized from their length in characters.
+    # The ratio is calibrated on a small sample: BERT splits on whitespace and punctuation before
+    # WordPiece, so a row's exact count is its cells' counts plus one "," token per separator.
+    sample = rows[:CSV_CALIBRATION_ROWS]
+    lengths = cell_token_lengths([cell for row in sample for cell in row])
+    sample_tokens = sum(sum(lengths[cell] for cell in row) + max(len(row) - 1, 0) for row in sample)
+    sample_chars = sum(len(text) for text in row_texts[:CSV_CALIBRATION_ROWS])
+    chars_per_token = sample_chars / sample_tokens if sample_tokens and sample_chars else CHAR_PER_TOKEN
+    char_lengths = np.fromiter(map(len, row_texts), dtype=np.int64, count=len(row_texts))
+    row_lengths = np.ceil(char_lengths / chars_per_token).astype(np.int64)
 
-        if current_tokens + row_tokens > 500:  # default ~500 tokens per chunk
-            chunks.append({
-                "chunk_id": chunk_id,
-                "content": "\n".join(current_chunk),
-            })
-            chunk_id += 1
-            current_chunk = []
-            current_tokens = 0
-
-        current_chunk.append(row_text)
-        current_tokens += row_tokens
-
-    if current_chunk:
+    # Greedy grouping: each chunk takes rows while its running total stays within the budget.
+    # With a prefix sum, a chunk's end is one binary search instead of a per-row Python loop;
+    # a row over budget on its own still gets a chunk.
+    cumulative = np.cumsum(row_lengths)
+    chunks = []
+    start = 0
+    while start < len(row_texts):
+        base = cumulative[start - 1] if start else 0
+        end = max(int(np.searchsorted(cumulative, base + CSV_CHUNK_TOKENS, side="right")), start + 1)
         chunks.append({
-            "chunk_id": chunk_id,
-            "content": "\n".join(current_chunk),
+            "chunk_id": len(chunks),
+            "content": "\n".join(row_texts[start:end]),
         })
+        start = end
 
     return chunks
 
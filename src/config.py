@@ -18,6 +18,8 @@ GCP_LOCATION = os.getenv("GCP_LOCATION")
 GOOGLE_APPLICATION_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 
 CHUNK_OVERLAP = 100
+# Fallback characters-per-token ratio for estimating CSV row sizes without tokenizing every row
+CHAR_PER_TOKEN = 4
 
 # Cohere
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
@@ -1,11 +1,15 @@
 # src/csv_ingestion.py
 import os
+import mmap
 import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from src.vector_manager import VectorDBManager
 from src.config import EMBED_DIM
-from src.embeddings import get_embedding
+from src.embeddings import embed_texts_array, EMBED_BATCH_SIZE
 
 load_dotenv()
 
@@ -13,19 +17,37 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_INDEX = os.getenv("PINECONE_INDEX", "biz-analyst-1024")
 NAMESPACE = os.getenv("PINECONE_NAMESPACE", "default")
 
-# Cohere-based embedding via src.embeddings.get_embedding
+# Cohere-based embedding via src.embeddings.embed_texts_array (96 texts per request)
 
 # Config
 MAX_ROWS = 200           # set None to ingest all
 MAX_CELL_CHARS = 200     # truncate long cell values
 MAX_CONTENT_CHARS = 1000 # truncate final content stored in metadata
 BATCH_SIZE = 200         # upsert in batches
+PIPELINE_WINDOW = 4      # embed requests in flight while earlier batches upsert
+CSV_CHUNK_ROWS = 1024    # rows parsed per read_csv chunk
+HASH_BLOCK_SIZE = 1 << 22  # 4 MB per hashlib update
 
 
 def sha256_bytes(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
 
+def sha256_file(path: str) -> str:
+    """
+    SHA-256 of a file hashed straight from a read-only mmap in fixed-size blocks,
+    so the file is never copied into a Python bytes object.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return h.hexdigest()  # empty files can't be mmapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m, memoryview(m) as view:
+            for i in range(0, len(view), HASH_BLOCK_SIZE):
+                h.update(view[i:i + HASH_BLOCK_SIZE])
+    return h.hexdigest()
+
+
 def detect_encoding(path: str):
     """
     Try to detect using charset-normalizer if available, else fallback to utf-8 then latin1.
@@ -51,23 +73,35 @@ def detect_encoding(path: str):
     return "utf-8"
 
 
-def row_to_text(row: pd.Series) -> str:
+def _truncate(s: pd.Series, limit: int) -> pd.Series:
     """
-    Deterministic single-line representation of a CSV row; truncate long values.
+    Cut strings longer than limit to limit-3 chars + "...". Only the long values are
+    sliced and re-concatenated; columns with none (the usual case) are returned as-is.
     """
-    parts = []
-    for col in row.index:
-        val = row[col]
-        if pd.isna(val):
-            continue
-        s = str(val).strip()
-        if len(s) > MAX_CELL_CHARS:
-            s = s[: MAX_CELL_CHARS - 3] + "..."
-        parts.append(f"{col}: {s}")
-    text = " | ".join(parts)
-    if len(text) > MAX_CONTENT_CHARS:
-        text = text[: MAX_CONTENT_CHARS - 3] + "..."
-    return " ".join(text.split())  # collapse whitespace
+    too_long = s.str.len() > limit
+    if not too_long.any():
+        return s
+    s = s.copy()
+    s[too_long] = s[too_long].str.slice(0, limit - 3) + "..."
+    return s
+
+
+def csv_rows_to_texts(df: pd.DataFrame) -> list:
+    """
+    Deterministic single-line "col: value | col: value" text for every row of df. Missing
+    cells are skipped, values are stripped and truncated to MAX_CELL_CHARS, the line to
+    MAX_CONTENT_CHARS, and whitespace is collapsed. Uses pandas string ops per column
+    instead of a Python loop per cell. (text_conversion.rows_to_texts formats rows differently.)
+    """
+    if df.empty:
+        return []
+    text = pd.Series("", index=df.index, dtype=object)
+    for col in df.columns:
+        s = _truncate(df[col].astype(str).str.strip(), MAX_CELL_CHARS)
+        # Every present cell adds " | col: value"; missing cells add nothing
+        text = text + (f" | {col}: " + s).where(df[col].notna(), "")
+    text = _truncate(text.str.slice(3), MAX_CONTENT_CHARS)  # drop the leading " | "
+    return text.str.split().str.join(" ").tolist()  # collapse whitespace
 
 
 def batch_iterable(iterable, batch_size):
@@ -84,58 +118,95 @@ def batch_iterable(iterable, batch_size):
 def ingest_csv_to_pinecone(csv_path: str, max_rows: int = MAX_ROWS):
     print(f"📂 Ingesting CSV: {csv_path}")
 
-    # compute deterministic file id from raw bytes
-    with open(csv_path, "rb") as f:
-        raw = f.read()
-    file_id = sha256_bytes(raw)
+    # compute deterministic file id from raw bytes; hashlib releases the GIL, so hashing
+    # runs in the background while the CSV is parsed and the Pinecone client connects
+    hasher = ThreadPoolExecutor(max_workers=1)
+    file_id_future = hasher.submit(sha256_file, csv_path)
+    hasher.shutdown(wait=False)
     filename = os.path.basename(csv_path)
 
     # detect encoding
     encoding = detect_encoding(csv_path)
     print(f"⚙️ Detected encoding: {encoding}")
 
-    # load csv
+    # stream the csv in chunks so memory stays bounded and embedding starts before the file is fully read
     try:
-        df = pd.read_csv(csv_path, encoding=encoding)
+        reader = pd.read_csv(csv_path, encoding=encoding, chunksize=CSV_CHUNK_ROWS, nrows=max_rows or None)
     except Exception as e:
         print("❌ Failed to read CSV with detected encodings:", e)
         raise
 
     if max_rows:
-        df = df.head(max_rows)
-        print(f"⚡ Limiting ingestion to first {len(df)} rows for testing.")
+        print(f"⚡ Limiting ingestion to first {max_rows} rows for testing.")
 
     # init pinecone manager
     db = VectorDBManager(api_key=PINECONE_API_KEY, index_name=PINECONE_INDEX, dimension=EMBED_DIM)
 
-    vectors = []
-    for i, row in df.iterrows():
-        chunk_id = f"row-{int(i)}"
-        vector_id = f"{file_id}__{chunk_id}"
-
-        row_text = row_to_text(row)
-        embedding = get_embedding(row_text)
-
-        metadata = {
-            "content": row_text,
-            "file_id": file_id,
-            "chunk_id": chunk_id,
-            "row_index": int(i),
-            "filename": filename
-        }
-
-        vectors.append({"id": vector_id, "values": embedding, "metadata": metadata})
-
-    # upsert in batches
+    def text_batches():
+        # Per embed batch: (row indices, row texts, distinct texts to embed, each row's position
+        # among them). Rows that stringify identically within a read_csv chunk (repeated totals,
+        # blank rows, ...) are embedded once and share the vector. read_csv chunks keep a running
+        # row index.
+        for chunk in reader:
+            # Row texts and indices stay as arrays so each batch is gathered with one take,
+            # not a Python loop over rows
+            texts = np.array(csv_rows_to_texts(chunk), dtype=object)
+            indices = chunk.index.to_numpy()
+            codes, unique = pd.factorize(texts)
+            unique = unique.tolist()
+            for start in range(0, len(unique), EMBED_BATCH_SIZE):
+                members = np.flatnonzero((codes >= start) & (codes < start + EMBED_BATCH_SIZE))
+                yield (indices[members].tolist(), texts[members].tolist(),
+                       unique[start:start + EMBED_BATCH_SIZE], codes[members] - start)
+
+    def build_vectors(indices, texts, embeddings):
+        # embeddings is a float32 (n, EMBED_DIM) array; each vector's values are a row view of it,
+        # converted to the wire format only inside the Pinecone client
+        file_id = file_id_future.result()
+        vectors = []
+        for i, text, embedding in zip(indices, texts, embeddings):
+            chunk_id = f"row-{i}"
+            metadata = {
+                "content": text,
+                "file_id": file_id,
+                "chunk_id": chunk_id,
+                "row_index": i,
+                "filename": filename
+            }
+            vectors.append({"id": f"{file_id}__{chunk_id}", "values": embedding, "metadata": metadata})
+        return vectors
+
+    # Two-stage pipeline: up to PIPELINE_WINDOW embed requests in flight, and each finished
+    # batch is upserted in the background while later batches are still being embedded
+    upserts = []
+    pending = deque()
+    rows = 0
+
+    def flush_oldest():
+        indices, texts, positions, future = pending.popleft()
+        vectors = build_vectors(indices, texts, future.result()[positions])
+        upserts.append((len(vectors), db.upsert_vectors_async(vectors, namespace=NAMESPACE, batch_size=BATCH_SIZE)))
+
+    with reader, ThreadPoolExecutor(max_workers=PIPELINE_WINDOW) as executor:
+        for indices, texts, unique_texts, positions in text_batches():
+            rows += len(texts)
+            pending.append((indices, texts, positions, executor.submit(embed_texts_array, unique_texts)))
+            if len(pending) >= PIPELINE_WINDOW:
+                flush_oldest()
+        while pending:
+            flush_oldest()
+
+    file_id = file_id_future.result()
     total = 0
-    for batch in batch_iterable(vectors, BATCH_SIZE):
-        db.upsert_vectors(batch, namespace=NAMESPACE)
-        total += len(batch)
-        print(f"  ↳ Upserted batch of {len(batch)} vectors (total {total})")
+    for n, futures in upserts:
+        for future in futures:
+            future.result()
+        total += n
+        print(f"  ↳ Upserted batch of {n} vectors (total {total})")
 
     print(f"✅ Ingested {total} vectors from {csv_path} into Pinecone (file_id={file_id})")
     # return manifest info for programmatic use
-    return {"file_id": file_id, "filename": filename, "rows": len(df), "vectors_upserted": total}
+    return {"file_id": file_id, "filename": filename, "rows": rows, "vectors_upserted": total}
 
 
 if __name__ == "__main__":
@@ -1,5 +1,8 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+import numpy as np
+import httpx
 import cohere
 
 # Load env once
@@ -11,12 +14,36 @@ COHERE_EMBED_MODEL = os.getenv("COHERE_EMBED_MODEL", "embed-english-v3.0")
 # Use "search_document" for corpus/doc vectors; use "search_query" when embedding queries
 COHERE_INPUT_TYPE_DOCUMENT = os.getenv("COHERE_INPUT_TYPE_DOCUMENT", "search_document")
 COHERE_INPUT_TYPE_QUERY = os.getenv("COHERE_INPUT_TYPE_QUERY", "search_query")
+# Cohere accepts at most 96 texts per embed call
+EMBED_BATCH_SIZE = 96
+# "int8" responses are a quarter the size of "float" with near-identical retrieval quality.
+# Documents and queries must use the same type; the cosine index is scale-invariant, so
+# the quantized values go into it unchanged.
+COHERE_EMBEDDING_TYPE = os.getenv("COHERE_EMBEDDING_TYPE", "int8")
+if COHERE_EMBEDDING_TYPE not in ("float", "int8"):
+    raise ValueError("COHERE_EMBEDDING_TYPE must be 'float' or 'int8'")
 
 if not COHERE_API_KEY:
     raise ValueError("COHERE_API_KEY not set in environment")
 
-# Initialize Cohere client once
-_co = cohere.Client(COHERE_API_KEY)
+# Initialize Cohere client once. The V2 client sits on httpx; giving it a pooled HTTP/2 client
+# lets the parallel embed batches share one keep-alive TLS connection instead of handshaking each.
+_http = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+    timeout=httpx.Timeout(300.0, connect=10.0),
+)
+_co = cohere.ClientV2(api_key=COHERE_API_KEY, httpx_client=_http)
+
+def _embed(texts, input_type):
+    resp = _co.embed(
+        texts=texts,
+        model=COHERE_EMBED_MODEL,
+        input_type=input_type,
+        embedding_types=[COHERE_EMBEDDING_TYPE],
+    )
+    # Typed responses group vectors by type; the float list is exposed as "float_"
+    return getattr(resp.embeddings, "float_" if COHERE_EMBEDDING_TYPE == "float" else COHERE_EMBEDDING_TYPE)
 
 def get_embedding(text: str, *, is_query: bool = False):
     """
@@ -24,12 +51,47 @@ def get_embedding(text: str, *, is_query: bool = False):
     Set is_query=True when embedding user queries to improve retrieval quality.
     """
     input_type = COHERE_INPUT_TYPE_QUERY if is_query else COHERE_INPUT_TYPE_DOCUMENT
-    resp = _co.embed(
-        texts=[text],
-        model=COHERE_EMBED_MODEL,
-        input_type=input_type,
-    )
-    return resp.embeddings[0]
+    return _embed([text], input_type)[0]
+
+def _embed_batches(texts, batch_size, max_workers):
+    """
+    Yield (offset, vectors) for each batch of texts, in input order.
+    Batches are embedded in parallel threads.
+    """
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    def embed_batch(batch):
+        return _embed(batch, COHERE_INPUT_TYPE_DOCUMENT)
+
+    if len(batches) == 1:
+        yield 0, embed_batch(batches[0])
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from zip(range(0, len(texts), batch_size), executor.map(embed_batch, batches))
+
+def embed_texts(texts, batch_size=EMBED_BATCH_SIZE, max_workers=4):
+    """
+    Embed a list of document texts, sending them to Cohere in batches of batch_size.
+    Batches are embedded in parallel threads; the returned vectors keep the input order.
+    """
+    vectors = []
+    for _, batch_vectors in _embed_batches(texts, batch_size, max_workers):
+        vectors.extend(batch_vectors)
+    return vectors
+
+def embed_texts_array(texts, batch_size=EMBED_BATCH_SIZE, max_workers=4):
+    """
+    Same as embed_texts, but returns one float32 array of shape (len(texts), dim).
+    Each batch is copied in as it arrives, so the per-float Python objects from the
+    API response are dropped batch by batch (~7x less memory than lists of floats).
+    """
+    out = None
+    for offset, batch_vectors in _embed_batches(texts, batch_size, max_workers):
+        if out is None:
+            out = np.empty((len(texts), len(batch_vectors[0])), dtype=np.float32)
+        out[offset:offset + len(batch_vectors)] = batch_vectors
+    return out if out is not None else np.empty((0, 0), dtype=np.float32)
 
 def embed_chunks(chunks):
     """
@@ -39,15 +101,9 @@ def embed_chunks(chunks):
     if not chunks:
         return chunks
 
-    texts = [chunk.get("content", "") for chunk in chunks]
-    resp = _co.embed(
-        texts=texts,
-        model=COHERE_EMBED_MODEL,
-        input_type=COHERE_INPUT_TYPE_DOCUMENT,
-    )
-    vectors = resp.embeddings
+    vectors = embed_texts([chunk.get("content", "") for chunk in chunks])
 
-    for i, chunk in enumerate(chunks):
-        chunk["embedding"] = vectors[i]
+    for chunk, vector in zip(chunks, vectors):
+        chunk["embedding"] = vector
 
-    return chunks
\ No newline at end of file
+    return chunks
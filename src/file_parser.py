@@ -1,27 +1,88 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import pdfplumber
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
 from docx import Document
+import csv
+import io
 import os
-from io import BytesIO
+
+# Bytes inspected to detect the CSV delimiter
+CSV_SNIFF_BYTES = 8192
 
 # -----------------------------
 # CSV Parsing
 # -----------------------------
+def _sniff_delimiter(sample):
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",\t;|").delimiter
+    except csv.Error:
+        return ","
+
+
+def _read_csv_arrow(obj):
+    """
+    Parse UTF-8 CSV with Arrow's multi-threaded block parser.
+    Raises pa.ArrowInvalid for input it can't handle (bad encoding, ragged rows, ...).
+    """
+    if isinstance(obj, (str, os.PathLike)):
+        with open(obj, "rb") as f:
+            sample = f.read(CSV_SNIFF_BYTES)
+        source = obj
+    else:
+        sample = obj.read(CSV_SNIFF_BYTES)
+        obj.seek(0)
+        # Arrow reads bytes; text buffers (StringIO) are encoded first
+        source = pa.BufferReader(obj.read().encode("utf-8")) if isinstance(sample, str) else obj
+    if isinstance(sample, bytes):
+        sample = sample.decode("utf-8", errors="ignore")
+
+    table = pacsv.read_csv(
+        source,
+        read_options=pacsv.ReadOptions(block_size=8 << 20, use_threads=True),
+        parse_options=pacsv.ParseOptions(delimiter=_sniff_delimiter(sample)),
+        # pandas treats empty fields as missing; match it
+        convert_options=pacsv.ConvertOptions(strings_can_be_null=True),
+    )
+    names = table.column_names
+    if len(set(names)) != len(names) or "" in names:
+        # pandas renames blank/duplicate headers ("Unnamed: 0", "a.1"); let it handle those files
+        raise pa.ArrowInvalid("blank or duplicate column names")
+    if any(pa.types.is_binary(t) or pa.types.is_large_binary(t) for t in table.schema.types):
+        # Non-UTF-8 text is read as raw bytes; the pandas path retries it as latin-1
+        raise pa.ArrowInvalid("column is not valid UTF-8")
+    df = table.to_pandas()
+    # Missing strings come back as None; use NaN like pandas so the cleanup below treats them the same
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
 def parse_csv(file_obj):
     """
     Reads a CSV/TSV file (path or file-like object) and returns all rows as a list of dicts.
-    Automatically detects delimiters (comma, tab, semicolon) using pandas' parser.
+    Automatically detects delimiters (comma, tab, semicolon, pipe) and parses with pyarrow;
+    falls back to pandas' python engine for files Arrow can't read.
     """
     def _read(obj):
+        try:
+            return _read_csv_arrow(obj)
+        except pa.ArrowInvalid:
+            if hasattr(obj, "seek"):
+                obj.seek(0)
         # Try utf-8 with auto delimiter detection; fall back to latin-1
         try:
             return pd.read_csv(obj, sep=None, engine='python', encoding='utf-8')
         except Exception:
-            if isinstance(obj, BytesIO):
+            if hasattr(obj, "seek"):
                 obj.seek(0)
             return pd.read_csv(obj, sep=None, engine='python', encoding='latin-1')
 
-    if isinstance(file_obj, BytesIO):
+    if hasattr(file_obj, "seek"):
         file_obj.seek(0)
         df = _read(file_obj)
     else:
@@ -41,49 +102,65 @@ def parse_csv(file_obj):
 # -----------------------------
 # PDF Parsing
 # -----------------------------
+def _has_paths(page):
+    # pdfplumber's default table finder needs ruling lines/rects; both are path objects in PDFium
+    return next(page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH]), None) is not None
+
+
 def parse_pdf(file_obj):
     """
     Reads a PDF and attempts to extract tabular data.
     Returns:
       - if tables detected: list of dict rows
       - else: list of text paragraphs
+    Text and page scanning use PDFium; pdfplumber is only opened for pages that draw
+    lines or boxes, since those are the only ones its table finder can match.
     """
-    def _extract(pdf):
+    def _extract_tables(src, page_numbers):
         rows = []
-        for page in pdf.pages:
-            # try tables first
-            try:
-                tables = page.extract_tables() or []
-            except Exception:
-                tables = []
-            for tbl in tables:
-                if not tbl or len(tbl) < 2:
-                    continue
-                header = tbl[0]
-                for r in tbl[1:]:
-                    rec = {}
-                    for i, h in enumerate(header):
-                        key = str(h).strip() if h is not None else f"col_{i}"
-                        val = r[i] if i < len(r) else None
-                        rec[key] = val
-                    rows.append(rec)
-        if rows:
-            return rows
+        with pdfplumber.open(src, pages=page_numbers) as pdf:
+            for page in pdf.pages:
+                # try tables first
+                try:
+                    tables = page.extract_tables() or []
+                except Exception:
+                    tables = []
+                for tbl in tables:
+                    if not tbl or len(tbl) < 2:
+                        continue
+                    header = tbl[0]
+                    for r in tbl[1:]:
+                        rec = {}
+                        for i, h in enumerate(header):
+                            key = str(h).strip() if h is not None else f"col_{i}"
+                            val = r[i] if i < len(r) else None
+                            rec[key] = val
+                        rows.append(rec)
+        return rows
+
+    if hasattr(file_obj, "seek"):
+        file_obj.seek(0)
+        src = io.BytesIO(file_obj.read())
+        pdf = pdfium.PdfDocument(src.getvalue())
+    else:
+        src = file_obj
+        pdf = pdfium.PdfDocument(file_obj)
+
+    try:
+        table_pages = [i + 1 for i in range(len(pdf)) if _has_paths(pdf[i])]
+        if table_pages:
+            rows = _extract_tables(src, table_pages)
+            if rows:
+                return rows
         # fallback: plain text paragraphs
         texts = []
-        for page in pdf.pages:
-            text = page.extract_text()
+        for page in pdf:
+            text = page.get_textpage().get_text_range().replace("\r\n", "\n").strip()
             if text:
                 texts.append(text)
         return texts
-
-    if isinstance(file_obj, BytesIO):
-        file_obj.seek(0)
-        with pdfplumber.open(file_obj) as pdf:
-            return _extract(pdf)
-    else:
-        with pdfplumber.open(file_obj) as pdf:
-            return _extract(pdf)
+    finally:
+        pdf.close()
 
 
 # -----------------------------
@@ -94,7 +171,7 @@ def parse_docx(file_obj):
     Reads a Word document and tries to extract tables first.
     Returns list of dict rows if tables found, else list of paragraphs.
     """
-    if isinstance(file_obj, BytesIO):
+    if hasattr(file_obj, "seek"):
         file_obj.seek(0)
         doc = Document(file_obj)
     else:
@@ -129,6 +206,7 @@ def parse_docx(file_obj):
 def parse_file(file_obj, filename=None):
     """
     Detects file type from filename (if provided) and parses accordingly.
+    Accepts a path or any seekable file-like object (BytesIO, SpooledTemporaryFile, ...).
     Returns list of text blocks.
     """
     if filename is None:
@@ -5,16 +5,39 @@ from src.config import GROQ_API_KEY
 
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
+SYSTEM_PROMPT = "You are BizAnalyst AI, a professional business analyst assistant."
+
+
+def _messages(prompt: str):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
 def ask_llm(prompt: str, model: str = "llama-3.1-8b-instant"):
     """
     Call Groq's LLM with the given prompt and return response content.
     """
     response = client.chat.completions.create(
         model=model,
-        messages=[
-            {"role": "system", "content": "You are BizAnalyst AI, a professional business analyst assistant."},
-            {"role": "user", "content": prompt}
-        ],
+        messages=_messages(prompt),
         temperature=0.2
     )
-    return response.choices[0].message.content
\ No newline at end of file
+    return response.choices[0].message.content
+
+
+def ask_llm_stream(prompt: str, model: str = "llama-3.1-8b-instant"):
+    """
+    Same call as ask_llm, but streamed: yields content deltas as Groq generates them,
+    so callers can start consuming the answer before the completion finishes.
+    """
+    stream = client.chat.completions.create(
+        model=model,
+        messages=_messages(prompt),
+        temperature=0.2,
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices:
+            yield chunk.choices[0].delta.content or ""
@@ -1,11 +1,14 @@
 import os
 import json
+import hashlib
+import threading
 from dotenv import load_dotenv
 from typing import List, Dict, Any, Tuple
+from cachetools import TTLCache
 
 from src.vector_manager import VectorDBManager
 from src.embeddings import get_embedding
-from src.llm import ask_llm
+from src.llm import ask_llm_stream
 
 load_dotenv()
 
@@ -15,6 +18,12 @@ PINECONE_INDEX = os.getenv("PINECONE_INDEX", "biz-analyst")
 MAX_CONTEXT_CHARS = 3000
 TOP_K = 6
 
+# Answers are cached per (namespace, normalized query) so repeated questions skip retrieval + LLM
+LLM_CACHE_SIZE = 1024
+LLM_CACHE_TTL = 600  # seconds
+_LLM_CACHE = TTLCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+_LLM_CACHE_LOCK = threading.Lock()
+
 def _format_sources(matches: List[Dict[str, Any]], max_chars: int) -> Tuple[str, List[Dict[str, Any]]]:
     parts = []
     sources = []
@@ -74,8 +83,11 @@ Important: Do not add any extra text outside the JSON. Do not include chain-of-t
     return prompt
 
 
-def query_llm(query: str, top_k: int = TOP_K, max_context_chars: int = MAX_CONTEXT_CHARS, namespace: str = None) -> Dict[str, Any]:
-    db = VectorDBManager(api_key=PINECONE_API_KEY, index_name=PINECONE_INDEX)
+def query_llm(query: str, top_k: int = TOP_K, max_context_chars: int = MAX_CONTEXT_CHARS, namespace: str = None,
+              db: VectorDBManager = None) -> Dict[str, Any]:
+    # Callers holding a client (the API process) pass it in; a fresh one per call opens another connection pool
+    if db is None:
+        db = VectorDBManager(api_key=PINECONE_API_KEY, index_name=PINECONE_INDEX)
     query_vector = get_embedding(query, is_query=True)
 
     if namespace:
@@ -94,7 +106,9 @@ def query_llm(query: str, top_k: int = TOP_K, max_context_chars: int = MAX_CONTE
         }
 
     prompt = _build_prompt(query, context_text)
-    llm_response = ask_llm(prompt)
+    # Stream the completion and assemble it as deltas arrive; the answer is one JSON document,
+    # so it is parsed once the stream ends
+    llm_response = "".join(ask_llm_stream(prompt))
 
     try:
         parsed = json.loads(llm_response.strip())
@@ -107,6 +121,33 @@ def query_llm(query: str, top_k: int = TOP_K, max_context_chars: int = MAX_CONTE
             "warning": "LLM response was not valid JSON."
         }
 
+def _cache_key(query: str, namespace: str = None) -> Tuple[str, bytes]:
+    normalized = " ".join(query.split()).lower()
+    return namespace, hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+def cached_query_llm(query: str, namespace: str = None, db: VectorDBManager = None) -> Dict[str, Any]:
+    """
+    query_llm() with a TTL cache keyed on (namespace, normalized query).
+    Queries differing only in case or whitespace share an entry.
+    """
+    key = _cache_key(query, namespace)
+    with _LLM_CACHE_LOCK:
+        cached = _LLM_CACHE.get(key)
+    if cached is not None:
+        return cached
+    result = query_llm(query, namespace=namespace, db=db)
+    with _LLM_CACHE_LOCK:
+        _LLM_CACHE[key] = result
+    return result
+
+
+def clear_query_cache(namespace: str) -> None:
+    """Drop cached answers for a namespace, e.g. after its vectors are replaced by a re-upload."""
+    with _LLM_CACHE_LOCK:
+        for key in [k for k in _LLM_CACHE if k[0] == namespace]:
+            _LLM_CACHE.pop(key, None)
+
 if __name__ == "__main__":
     test_query = "Summarize the key business insights from uploaded documents."
     out = query_llm(test_query)
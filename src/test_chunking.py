@@ -0,0 +1,41 @@
+import io
+import unittest
+from unittest import mock
+import chunking
+
+
+def _fake_token_lengths(cells):
+    # Two tokens per cell: a row of two 4-char cells ("aaaa, bbbb", 10 chars) is 2 + 2 + 1 = 5
+    # tokens, so the calibrated ratio is exactly 2 chars per token
+    return {cell: 2 for cell in cells}
+
+
+def _csv(rows):
+    return io.BytesIO(("h1,h2\n" + "".join(f"{a},{b}\n" for a, b in rows)).encode("utf-8"))
+
+
+class TestCsvChunker(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(chunking, "cell_token_lengths", side_effect=_fake_token_lengths)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rows_grouped_up_to_token_budget(self):
+        rows = [(f"{i:04d}", "bbbb") for i in range(250)]
+        chunks = chunking.csv_chunker(_csv(rows))
+        # 5 tokens per row, so a 500-token chunk holds 100 rows
+        rows_per_chunk = chunking.CSV_CHUNK_TOKENS // 5
+        self.assertEqual([c["content"].count("\n") + 1 for c in chunks], [rows_per_chunk, rows_per_chunk, 50])
+        self.assertEqual([c["chunk_id"] for c in chunks], [0, 1, 2])
+        self.assertEqual("\n".join(c["content"] for c in chunks), "\n".join(f"{a}, {b}" for a, b in rows))
+
+    def test_oversized_row_gets_own_chunk(self):
+        rows = [(f"{i:04d}", "bbbb") for i in range(40)]
+        rows.insert(35, ("long", "x" * 2000))
+        chunks = chunking.csv_chunker(_csv(rows))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[1]["content"], "long, " + "x" * 2000)
+        self.assertEqual("\n".join(c["content"] for c in chunks), "\n".join(f"{a}, {b}" for a, b in rows))
+
+    def test_header_only(self):
+        self.assertEqual(chunking.csv_chunker(io.BytesIO(b"h1,h2\n")), [])
@@ -0,0 +1,46 @@
+import os
+import unittest
+import numpy as np
+import pandas as pd
+
+# The embeddings module refuses to load without a key; no request is made in these tests
+os.environ.setdefault("COHERE_API_KEY", "test-key")
+
+from csv_ingestion import csv_rows_to_texts, MAX_CELL_CHARS, MAX_CONTENT_CHARS
+
+
+class TestCsvRowsToTexts(unittest.TestCase):
+    def test_basic_rows(self):
+        df = pd.DataFrame({"ORDER": [10112, 10113], "SALES": [7209.11, 12.5], "CITY": ["Lulea", "NYC"]})
+        self.assertEqual(csv_rows_to_texts(df), [
+            "ORDER: 10112 | SALES: 7209.11 | CITY: Lulea",
+            "ORDER: 10113 | SALES: 12.5 | CITY: NYC",
+        ])
+
+    def test_missing_values(self):
+        df = pd.DataFrame({
+            "A": [1.5, np.nan, np.nan],
+            "B": ["x", None, "z"],
+            "C": [np.nan, np.nan, np.nan],
+        })
+        self.assertEqual(csv_rows_to_texts(df), ["A: 1.5 | B: x", "", "B: z"])
+
+    def test_long_cells_and_content(self):
+        df = pd.DataFrame({
+            "short": ["a", "b"],
+            "long": ["x" * (MAX_CELL_CHARS + 50), "y" * MAX_CELL_CHARS],
+        })
+        self.assertEqual(csv_rows_to_texts(df), [
+            "short: a | long: " + "x" * (MAX_CELL_CHARS - 3) + "...",
+            "short: b | long: " + "y" * MAX_CELL_CHARS,
+        ])
+        wide = pd.DataFrame({f"col{i}": ["v" * 150] for i in range(10)})
+        full = " | ".join(f"col{i}: " + "v" * 150 for i in range(10))
+        self.assertEqual(csv_rows_to_texts(wide), [full[:MAX_CONTENT_CHARS - 3] + "..."])
+
+    def test_whitespace(self):
+        df = pd.DataFrame({"A": ["  padded  ", "tab\tand\nnewline", "   "], "B": ["x  y", " ", "z"]})
+        self.assertEqual(csv_rows_to_texts(df), ["A: padded | B: x y", "A: tab and newline | B:", "A: | B: z"])
+
+    def test_empty_frame(self):
+        self.assertEqual(csv_rows_to_texts(pd.DataFrame({"A": []})), [])
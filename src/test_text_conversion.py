@@ -0,0 +1,31 @@
+import unittest
+from text_conversion import sanitize_text
+
+
+class TestSanitizeText(unittest.TestCase):
+    def test_known_values(self):
+        self.assertEqual(sanitize_text(None), "")
+        self.assertEqual(sanitize_text("  plain   ascii\ttext\n"), "plain ascii text")
+        self.assertEqual(sanitize_text("a\x00b\x07c"), "a b c")
+        self.assertEqual(sanitize_text("Ã©tÃ©"), "été")
+        self.assertEqual(sanitize_text(12.5), "12.5")
+
+    def test_ascii_fast_path_matches_full_path(self):
+        # A trailing NUL forces the full cleaning path (the text is no longer printable);
+        # it becomes a space and is stripped, so both paths must agree on everything else
+        cases = [
+            "",
+            " ",
+            "plain ascii text",
+            "  ORDERNUMBER: 10112 | SALES: 7209.11 |  CUSTOMERNAME: Volvo Model Replicas, Co  ",
+            "punctuation !\"#$%&'()*+,-./:;<=>?@[]^_`{|}~",
+            "back\\slash and \\n literal",
+            "multiple     inner     spaces",
+        ]
+        for text in cases:
+            with self.subTest(text=text):
+                self.assertEqual(sanitize_text(text), sanitize_text(text + "\x00"))
+
+    def test_escapes_take_full_path(self):
+        self.assertEqual(sanitize_text("\\x41\\x42"), "AB")
+        self.assertEqual(sanitize_text("Berguvsv\\x84gen 8"), sanitize_text("Berguvsv\\x84gen 8\x00"))
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils import SpillingLRUCache, safe_json_records, safe_json_records_df
+
+
+class TestSpillingLRUCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.spill_dir = os.path.join(self._tmp.name, "spill")
+        self.cache = SpillingLRUCache(maxsize=2, spill_dir=self.spill_dir)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_evicted_frame_is_spilled_and_reloaded(self):
+        first = pd.DataFrame({"Region": ["East", "West"], "Sales": [1.5, 2.5]})
+        self.cache[("u1", "a.csv")] = {"df": first}
+        self.cache[("u1", "b.csv")] = {"df": pd.DataFrame({"x": [1]})}
+        self.cache[("u1", "c.csv")] = {"df": pd.DataFrame({"x": [2]})}
+
+        self.assertNotIn(("u1", "a.csv"), self.cache)
+        path = self.cache.spill_path(("u1", "a.csv"))
+        # Eviction only queues the frame; spill_evicted() does the write
+        self.assertFalse(os.path.exists(path))
+        self.cache.spill_evicted()
+        self.assertTrue(os.path.exists(path))
+        pd.testing.assert_frame_equal(self.cache.load_spilled(("u1", "a.csv")), first)
+        # Reading it back removes the file
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(self.cache.load_spilled(("u1", "a.csv")))
+
+    def test_evicted_frame_readable_before_spill(self):
+        first = pd.DataFrame({"x": [1, 2]})
+        self.cache[("u1", "a.csv")] = {"df": first}
+        self.cache[("u1", "b.csv")] = {"df": pd.DataFrame({"x": [1]})}
+        self.cache[("u1", "c.csv")] = {"df": pd.DataFrame({"x": [2]})}
+        self.assertIs(self.cache.load_spilled(("u1", "a.csv")), first)
+        self.cache.spill_evicted()
+        self.assertFalse(os.path.exists(self.cache.spill_path(("u1", "a.csv"))))
+
+    def test_drop_spilled(self):
+        self.cache[("u1", "a.csv")] = {"df": pd.DataFrame({"x": [1]})}
+        self.cache[("u1", "b.csv")] = {"df": pd.DataFrame({"x": [1]})}
+        self.cache[("u1", "c.csv")] = {"df": pd.DataFrame({"x": [2]})}
+        self.cache.spill_evicted()
+        self.cache.drop_spilled(("u1", "a.csv"))
+        self.assertEqual(os.listdir(self.spill_dir), [])
+        self.assertIsNone(self.cache.load_spilled(("u1", "a.csv")))
+
+    def test_never_evicted_key(self):
+        self.cache[("u1", "a.csv")] = {"df": pd.DataFrame({"x": [1]})}
+        self.assertIsNone(self.cache.load_spilled(("u1", "a.csv")))
+        self.assertIsNone(self.cache.load_spilled(("u2", "missing.csv")))
+
+    def test_spill_paths_differ_per_key(self):
+        self.assertNotEqual(self.cache.spill_path(("u1", "a.csv")), self.cache.spill_path(("u2", "a.csv")))
+
+
+class TestSafeJsonRecordsDf(unittest.TestCase):
+    def _frame(self):
+        return pd.DataFrame({
+            "sales": [1.5, np.inf, -np.inf, np.nan],
+            "qty": np.array([1, 2, 3, 4], dtype=np.int64),
+            "region": ["East", "West", "North", "South"],
+            "date": pd.date_range("2024-01-01", periods=4, freq="D"),
+        })
+
+    def test_non_finite_floats_become_none(self):
+        records = safe_json_records_df(self._frame())
+        self.assertEqual([r["sales"] for r in records], [1.5, None, None, None])
+
+    def test_other_columns_unchanged(self):
+        df = self._frame()
+        records = safe_json_records_df(df)
+        self.assertEqual([r["qty"] for r in records], [1, 2, 3, 4])
+        self.assertEqual([r["region"] for r in records], ["East", "West", "North", "South"])
+        self.assertEqual([r["date"] for r in records], list(df["date"]))
+        # The caller's frame isn't modified
+        self.assertTrue(np.isinf(df["sales"].iloc[1]))
+
+    def test_matches_safe_json_records(self):
+        df = self._frame()
+        self.assertEqual(safe_json_records_df(df), safe_json_records(df.to_dict("records")))
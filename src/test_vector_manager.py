@@ -0,0 +1,73 @@
+import threading
+import unittest
+from unittest import mock
+from pinecone.exceptions import PineconeException
+import vector_manager
+from vector_manager import VectorDBManager, UPSERT_RETRIES
+
+
+class FlakyIndex:
+    """Index double whose upsert fails a set number of times before succeeding."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        self.upserted = []
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, namespace):
+        with self._lock:
+            self.calls += 1
+            if self.failures > 0:
+                self.failures -= 1
+                raise PineconeException("temporarily unavailable")
+            self.upserted.extend(v["id"] for v in vectors)
+
+
+def _manager(index):
+    # Skip __init__: it contacts Pinecone to resolve the index
+    db = VectorDBManager.__new__(VectorDBManager)
+    db.index = index
+    db.index_name = "test-index"
+    db._executor = None
+    db._executor_lock = threading.Lock()
+    return db
+
+
+def _vectors(n):
+    return [{"id": f"v{i}", "values": [0.0] * 4, "metadata": {}} for i in range(n)]
+
+
+class TestUpsertVectorsAsync(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(vector_manager, "UPSERT_BACKOFF", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failed_batch_is_retried(self):
+        index = FlakyIndex(failures=2)
+        db = _manager(index)
+        futures = db.upsert_vectors_async(_vectors(5), namespace="ns", batch_size=5)
+        self.assertEqual([f.result() for f in futures], [5])
+        self.assertEqual(index.calls, 3)
+        self.assertEqual(sorted(index.upserted), [f"v{i}" for i in range(5)])
+        db.close()
+
+    def test_batch_raises_after_retries(self):
+        index = FlakyIndex(failures=UPSERT_RETRIES + 1)
+        db = _manager(index)
+        futures = db.upsert_vectors_async(_vectors(3), namespace="ns", batch_size=3)
+        with self.assertRaises(PineconeException):
+            futures[0].result()
+        self.assertEqual(index.calls, UPSERT_RETRIES + 1)
+        db.close()
+
+    def test_calls_share_one_executor(self):
+        db = _manager(FlakyIndex(failures=0))
+        first = db.upsert_vectors_async(_vectors(4), namespace="ns", batch_size=2)
+        executor = db._executor
+        second = db.upsert_vectors_async(_vectors(4), namespace="ns", batch_size=2)
+        self.assertIs(db._executor, executor)
+        self.assertEqual([f.result() for f in first + second], [2, 2, 2, 2])
+        db.close()
+        self.assertIsNone(db._executor)
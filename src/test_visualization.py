@@ -0,0 +1,35 @@
+import unittest
+import pandas as pd
+from visualization import detect_column_types, schema_types
+
+
+def _sales_frame():
+    return pd.DataFrame({
+        "Date": pd.date_range(start="2023-01-01", periods=4, freq="D"),
+        "Sales": [100, 150, 200, 130],
+        "Category": ["A", "B", "A", "B"],
+    })
+
+
+class TestColumnTypes(unittest.TestCase):
+    def test_detect_column_types(self):
+        types = detect_column_types(_sales_frame())
+        self.assertEqual(types, {"numerical": ["Sales"], "categorical": ["Category"], "datetime": ["Date"]})
+
+    def test_detect_column_types_arrow(self):
+        df = _sales_frame().convert_dtypes(dtype_backend="pyarrow")
+        types = detect_column_types(df)
+        self.assertEqual(types["datetime"], ["Date"])
+        self.assertEqual(types["numerical"], ["Sales"])
+        self.assertEqual(types["categorical"], ["Category"])
+
+    def test_schema_types_date_column(self):
+        expected = {"Date": "datetime", "Sales": "numeric", "Category": "categorical"}
+        df = _sales_frame()
+        self.assertEqual(schema_types(df), expected)
+        # Cached frames are Arrow-backed; the labels must not change
+        self.assertEqual(schema_types(df.convert_dtypes(dtype_backend="pyarrow")), expected)
+
+    def test_schema_types_reuses_detected_types(self):
+        df = _sales_frame().convert_dtypes(dtype_backend="pyarrow")
+        self.assertEqual(schema_types(df, detect_column_types(df)), schema_types(df))
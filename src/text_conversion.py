@@ -3,13 +3,17 @@
 Convert parsed rows / chunks into deterministic, human-friendly text ready for embeddings.
 Includes:
 - row_to_text() for pandas rows
+- rows_to_texts() / precompute_row_formatter() for many rows sharing the same columns
 - sanitize_text() to fix escape sequences and collapse whitespace
 - chunk_text_normalize() to prepend metadata and enforce length limits
 - convert_chunks_for_embedding() to accept a list of chunk dicts or pandas.Series and return
   standardized dicts: {'chunk_id','file_id','text','metadata'}
+- iter_chunks_for_embedding() to yield the same dicts one at a time
 """
 
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Iterable, Iterator
+import os
+import numpy as np
 import pandas as pd
 import re
 import codecs
@@ -19,6 +23,25 @@ MAX_CELL_CHARS = 200        # max chars per CSV cell before truncation
 MAX_CHUNK_CHARS = 2000      # max characters per chunk text stored for embedding/context
 MAX_SNIPPET = 400           # snippet size to show in UI
 
+# Mojibake repair in sanitize_text (step 3). On by default: step 1's unicode_escape decode turns
+# non-ASCII text into mojibake itself ("Café \\x41" -> "CafÃ© A"), and CSVs read with a
+# latin-1 fallback can contain it. The branch only runs on text containing 'Ã'/'Â', so clean
+# text pays one substring check either way; set SANITIZE_MOJIBAKE=0 to keep those characters as-is.
+ENABLE_MOJIBAKE_REPAIR = os.getenv("SANITIZE_MOJIBAKE", "1") == "1"
+
+# Patterns used by sanitize_text on every call, compiled once
+_HEX_ESCAPE_RE = re.compile(r"\\x([0-9A-Fa-f]{2})")
+_CONTROL_CHARS_RE = re.compile(r"[^\x09\x0A\x0D\x20-\x7E\x80-\xFF]")
+# The same filter restricted to ASCII (C0 controls except tab/LF/CR, plus DEL), for str.translate
+_CTRL_TABLE = str.maketrans({i: " " for i in [*range(0x20), 0x7F] if i not in (0x09, 0x0A, 0x0D)})
+
+def _repl_hex(m):
+    try:
+        b = bytes([int(m.group(1), 16)])
+        return b.decode("cp1252", errors="replace")
+    except Exception:
+        return ""
+
 def sanitize_text(s: Optional[str]) -> str:
     """
     Robust cleaning for:
@@ -31,6 +54,11 @@ def sanitize_text(s: Optional[str]) -> str:
         return ""
     orig = str(s)
 
+    # Fast path for the common case: printable ASCII has no escapes to decode, no mojibake
+    # and no control chars, so only whitespace collapsing applies (both checks run in C)
+    if orig.isascii() and orig.isprintable() and r"\x" not in orig:
+        return " ".join(orig.split())
+
     # 1) If the string contains explicit backslash-x escapes, decode them first
     #    e.g. "Berguvsv\\x84gen" -> try to interpret the escape.
     if r"\x" in orig:
@@ -43,28 +71,32 @@ def sanitize_text(s: Optional[str]) -> str:
 
     # 2) Replace leftover \xNN patterns by mapping the byte to cp1252 char
     #    This handles cases where sequences remained like "\x84"
-    def _repl_hex(m):
-        try:
-            b = bytes([int(m.group(1), 16)])
-            return b.decode("cp1252", errors="replace")
-        except Exception:
-            return ""
-    t = re.sub(r"\\x([0-9A-Fa-f]{2})", _repl_hex, t)
+    #    (Substring checks are much cheaper than a regex scan, and most text has neither
+    #    escapes nor mojibake, so steps 2 and 3 only scan when their marker is present.)
+    if "\\x" in t:
+        t = _HEX_ESCAPE_RE.sub(_repl_hex, t)
 
     # 3) Fix common mojibake: if we see sequences like 'Ã' or 'Â' mixed with other text,
     #    try a latin1->utf-8 re-decode which often repairs utf8 decoded as latin1.
     #    Only attempt if it looks like mojibake, to avoid corrupting already-correct text.
-    if re.search(r"[ÃÂ]", t):
+    if ENABLE_MOJIBAKE_REPAIR and ("Ã" in t or "Â" in t):
         try:
             candidate = t.encode("latin1", errors="replace").decode("utf-8", errors="replace")
-            # keep the candidate only if it improves (fewer replacement markers or fewer odd chars)
-            if sum(1 for ch in candidate if ch == "�") <= sum(1 for ch in t if ch == "�"):
+            # keep the candidate only if it improves (fewer replacement markers or fewer odd chars);
+            # a clean repair has none, so the original only needs counting when it doesn't
+            bad = candidate.count("\ufffd")
+            if bad == 0 or bad <= t.count("\ufffd"):
                 t = candidate
         except Exception:
             pass
 
     # 4) Remove non-printable control characters and collapse whitespace
-    t = re.sub(r"[^\x09\x0A\x0D\x20-\x7E\x80-\xFF]", " ", t)
+    #    str.translate is a table lookup per char on ASCII input but much slower than the
+    #    regex on anything wider, so it only takes the ASCII case
+    if t.isascii():
+        t = t.translate(_CTRL_TABLE)
+    else:
+        t = _CONTROL_CHARS_RE.sub(" ", t)
     t = " ".join(t.split())
     return t.strip()
 
@@ -74,52 +106,130 @@ def row_to_text(row: pd.Series, max_cell_chars: int = MAX_CELL_CHARS) -> str:
       "COL1: val1 | COL2: val2 | ..."
     Truncates cells longer than max_cell_chars and drops NaNs.
     """
+    # One tolist() and precompute_row_formatter's identity/self-inequality NA check instead of
+    # a row[col] lookup + pd.isna call per cell
     parts = []
-    for col in row.index:
-        val = row[col]
-        if pd.isna(val):
+    for col, val in zip(row.index, row.tolist()):
+        if val is None or val is pd.NA or val != val:
             continue
-        s = str(val).strip()
+        s = (val if isinstance(val, str) else str(val)).strip()
         if len(s) > max_cell_chars:
             s = s[: max_cell_chars - 3] + "..."
         parts.append(f"{col}: {s}")
     text = " | ".join(parts)
     return sanitize_text(text)[:MAX_CHUNK_CHARS]
 
-def chunk_text_normalize(text: str, prefix_meta: Optional[Dict[str, Any]] = None) -> str:
+def precompute_row_formatter(columns, max_cell_chars: int = MAX_CELL_CHARS):
+    """
+    Build row_to_text() for rows that all share `columns` (e.g. df.columns).
+    The "COL: " prefixes are formatted once; the returned function takes a row's values in
+    column order (a tuple from df.itertuples(index=False, name=None) or Series.tolist()) and
+    skips missing cells with identity/self-inequality checks instead of pd.isna per cell.
+    """
+    prefixes = [f"{col}: " for col in columns]
+
+    def format_row(values) -> str:
+        parts = []
+        for prefix, val in zip(prefixes, values):
+            # None / pd.NA, or NaN / NaT (the only values not equal to themselves)
+            if val is None or val is pd.NA or val != val:
+                continue
+            s = str(val).strip()
+            if len(s) > max_cell_chars:
+                s = s[: max_cell_chars - 3] + "..."
+            parts.append(prefix + s)
+        return sanitize_text(" | ".join(parts))[:MAX_CHUNK_CHARS]
+
+    return format_row
+
+def _datetime_cells(col: pd.Series) -> Optional[np.ndarray]:
+    """
+    str(Timestamp) of every cell of a tz-naive datetime64 column, formatted in one numpy call
+    (None for NaT), or None if the column doesn't qualify. str() on a Timestamp costs ~2µs,
+    several times any other cell type. Columns with sub-second values are left to str(),
+    since its output there depends on the precision.
+    """
+    if not pd.api.types.is_datetime64_dtype(col.dtype) or not len(col):
+        return None
+    values = col.to_numpy()
+    nat = np.isnat(values)
+    seconds = values.astype("datetime64[s]")
+    if (values[~nat] != seconds[~nat]).any():
+        return None
+    cells = np.char.replace(np.datetime_as_string(seconds, unit="s"), "T", " ").astype(object)
+    cells[nat] = None
+    return cells
+
+def rows_to_texts(df: pd.DataFrame, max_cell_chars: int = MAX_CELL_CHARS) -> List[str]:
+    """
+    row_to_text() for every row of df, without building a Series per row.
+    Datetime columns are stringified up front for the whole column (see _datetime_cells).
+    """
+    format_row = precompute_row_formatter(df.columns, max_cell_chars)
+    # like df.itertuples(index=False, name=None), by position because of possible duplicate names
+    columns = []
+    for k in range(df.shape[1]):
+        col = df.iloc[:, k]
+        cells = _datetime_cells(col)
+        columns.append(col if cells is None else cells)
+    return [format_row(values) for values in zip(*columns)]
+
+def _batch_row_texts(chunks: List[Any]) -> Dict[int, str]:
+    """
+    Row texts for the pandas.Series inputs of convert_chunks_for_embedding, keyed by position.
+    Rows that share one column index (i.e. came from the same DataFrame) reuse a single
+    precomputed formatter; anything else is left to row_to_text() per item.
+    """
+    rows = {}
+    for i, c in enumerate(chunks):
+        if isinstance(c, pd.Series):
+            rows[i] = c
+        elif isinstance(c, dict) and "content" in c and isinstance(c["content"], pd.Series):
+            rows[i] = c["content"]
+    if len(rows) < 2:
+        return {}
+    columns = next(iter(rows.values())).index
+    if not all(r.index.equals(columns) for r in rows.values()):
+        return {}
+    format_row = precompute_row_formatter(columns)
+    return {i: format_row(r.tolist()) for i, r in rows.items()}
+
+def _resanitize_changes(t: str) -> bool:
+    """
+    Whether sanitize_text(t) can differ from t when t is already sanitize_text() output
+    (possibly truncated). A second pass only does anything on leftover escapes/mojibake
+    markers, or on whitespace exposed at the end by truncation.
+    """
+    return "\\x" in t or "Ã" in t or "Â" in t or t[-1:].isspace()
+
+def chunk_text_normalize(text: str, prefix_meta: Optional[Dict[str, Any]] = None,
+                         already_sanitized: bool = False) -> str:
     """
     Normalize whitespace and optionally prepend metadata as 'key:value | ...'.
     Enforce MAX_CHUNK_CHARS limit.
+    Pass already_sanitized=True for sanitize_text()/row_to_text() output to skip the
+    redundant second cleaning pass (the result is the same either way).
     """
-    t = sanitize_text(text)
+    t = sanitize_text(text) if not already_sanitized or _resanitize_changes(text) else text
     if prefix_meta:
+        # A list comprehension on purpose: str.join materializes a generator into a list first,
+        # so a generator here is slower, not leaner (as is meta + " | " + t vs the f-string)
         meta = " | ".join([f"{k}:{v}" for k, v in prefix_meta.items() if v is not None])
         t = f"{meta} | {t}"
     if len(t) > MAX_CHUNK_CHARS:
         t = t[: MAX_CHUNK_CHARS - 3] + "..."
     return t
 
-def _make_snippet(text: str, n: int = MAX_SNIPPET) -> str:
-    """Return a short snippet for UI from text."""
-    if not text:
-        return ""
-    return text[:n] + ("..." if len(text) > n else "")
-
-def convert_chunks_for_embedding(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def iter_chunks_for_embedding(chunks: Iterable[Any]) -> Iterator[Dict[str, Any]]:
     """
-    Input: list of chunk dicts. Each chunk may be:
-      - {'file_id', 'chunk_id', 'content' or 'text'} OR
-      - a pandas.Series as 'content' (row)
-    Output: list of dicts:
-      {
-        'chunk_id': ...,
-        'file_id': ...,
-        'text': <string ready for embedding>,
-        'metadata': { ... }   # includes snippet, original_meta fields
-      }
+    Generator form of convert_chunks_for_embedding(): yields one output dict per chunk, so a
+    consumer that embeds/upserts in batches only holds a batch of converted chunks at a time.
+    Series rows get the shared-formatter speedup when chunks is a list; other iterables are
+    consumed lazily and formatted per row.
     """
-    out = []
-    for c in chunks:
+    # Series rows from one DataFrame share a precomputed formatter
+    row_texts = _batch_row_texts(chunks) if isinstance(chunks, list) else {}
+    for i, c in enumerate(chunks):
         orig_meta = {}
         file_id = None
         chunk_id = None
@@ -128,7 +238,7 @@ def convert_chunks_for_embedding(chunks: List[Dict[str, Any]]) -> List[Dict[str,
             orig_meta = {}
             file_id = None
             chunk_id = f"row-{int(c.name)}" if c.name is not None else None
-            content = row_to_text(c)
+            content = row_texts[i] if i in row_texts else row_to_text(c)
         else:
             # assume dict-like
             if isinstance(c, dict):
@@ -150,7 +260,7 @@ def convert_chunks_for_embedding(chunks: List[Dict[str, Any]]) -> List[Dict[str,
 
                 # if the content_obj is a pandas Series, convert appropriately
                 if isinstance(content_obj, pd.Series):
-                    content = row_to_text(content_obj)
+                    content = row_texts[i] if i in row_texts else row_to_text(content_obj)
                 else:
                     content = sanitize_text(str(content_obj))
             else:
@@ -167,21 +277,42 @@ def convert_chunks_for_embedding(chunks: List[Dict[str, Any]]) -> List[Dict[str,
         if chunk_id:
             prefix_meta["chunk_id"] = chunk_id
         # normalize text with metadata and length guard
-        text_for_embedding = chunk_text_normalize(content, prefix_meta=prefix_meta)
+        # every branch above already ran content through sanitize_text
+        text_for_embedding = chunk_text_normalize(content, prefix_meta=prefix_meta, already_sanitized=True)
 
-        metadata = {"snippet": _make_snippet(text_for_embedding, n=MAX_SNIPPET)}
+        # short UI snippet, inlined since it runs once per chunk
+        if len(text_for_embedding) <= MAX_SNIPPET:
+            snippet = text_for_embedding
+        else:
+            snippet = text_for_embedding[:MAX_SNIPPET] + "..."
+        metadata = {"snippet": snippet}
         # preserve and merge original metadata keys (without huge fields)
         for k, v in orig_meta.items():
             if k not in ("content", "text"):
                 metadata[k] = v
 
-        out.append({
+        yield {
             "chunk_id": chunk_id,
             "file_id": file_id,
             "text": text_for_embedding,
             "metadata": metadata
-        })
-    return out
+        }
+
+def convert_chunks_for_embedding(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Input: list of chunk dicts. Each chunk may be:
+      - {'file_id', 'chunk_id', 'content' or 'text'} OR
+      - a pandas.Series as 'content' (row)
+    Output: list of dicts:
+      {
+        'chunk_id': ...,
+        'file_id': ...,
+        'text': <string ready for embedding>,
+        'metadata': { ... }   # includes snippet, original_meta fields
+      }
+    Use iter_chunks_for_embedding() to stream the same dicts instead of building the list.
+    """
+    return list(iter_chunks_for_embedding(chunks))
 
 # quick self-test when run directly
 if __name__ == "__main__":
@@ -2,9 +2,37 @@
 
 import os
 import psutil
+import numpy as np
+import pandas as pd
 import logging
-import uuid
+import secrets
 import time
+import functools
+import hashlib
+import threading
+from cachetools import LRUCache
+
+# profile_time only wraps functions when this is set (PROFILE_ENABLED=1); otherwise it returns them unchanged
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+_LOGGER = logging.getLogger("doc_analyst")
+
+# psutil.virtual_memory() parses /proc/meminfo on every call; readings are reused for this long
+MEMORY_READING_TTL = 0.5  # seconds
+_LAST_MEM = (float("-inf"), 0)  # (time.monotonic() of the reading, available bytes)
+
+
+def get_available_memory_bytes():
+    """
+    Returns available system memory in bytes (reading cached for MEMORY_READING_TTL seconds).
+    Prefer this over get_available_memory_gb() when comparing against byte thresholds.
+    """
+    global _LAST_MEM
+    now = time.monotonic()
+    taken_at, available = _LAST_MEM
+    if now - taken_at >= MEMORY_READING_TTL:
+        available = psutil.virtual_memory().available
+        _LAST_MEM = (now, available)
+    return available
 
 
 def get_available_memory_gb():
@@ -12,16 +40,16 @@ def get_available_memory_gb():
     Returns available system memory in gigabytes.
     Useful to dynamically manage chunk sizes or monitor resource usage.
     """
-    mem = psutil.virtual_memory()
-    return mem.available / (1024 ** 3)
+    return get_available_memory_bytes() / (1024 ** 3)
 
 
 def generate_chunk_id(file_id, index):
     """
-    Generates a unique chunk ID combining the file ID, row/index, and a random UUID suffix.
+    Generates a unique chunk ID combining the file ID, row/index, and a random 8-hex-char suffix.
     Useful for traceability in vector DB and query referencing.
+    The suffix is 4 random bytes from os.urandom (secrets.token_hex(4)).
     """
-    unique_suffix = uuid.uuid4().hex[:8]
+    unique_suffix = secrets.token_hex(4)
     return f"{file_id}-chunk-{index}-{unique_suffix}"
 
 
@@ -43,13 +71,18 @@ def setup_logger(name="doc_analyst", level=logging.INFO):
 def profile_time(func):
     """
     Decorator for timing function executions for profiling and debugging.
-    Prints execution time on function completion.
+    Logs execution time (perf_counter_ns, in µs) at DEBUG level on function completion.
+    A no-op unless PROFILE_ENABLED is set.
     """
+    if not PROFILE_ENABLED:
+        return func
+
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start = time.time()
+        start = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        elapsed = time.time() - start
-        print(f"[PROFILE] {func.__name__} executed in {elapsed:.3f} seconds")
+        elapsed_us = (time.perf_counter_ns() - start) / 1000
+        _LOGGER.debug("[PROFILE] %s executed in %.3f µs", func.__name__, elapsed_us)
         return result
     return wrapper
 
@@ -59,8 +92,6 @@ def validate_dataframe(df, min_rows=1):
     Simple check if an object is a valid pandas DataFrame with data.
     Returns True if DataFrame has >= min_rows rows.
     """
-    import pandas as pd
-
     if not isinstance(df, pd.DataFrame):
         return False
     if df.empty or df.shape[0] < min_rows:
@@ -79,6 +110,131 @@ def ensure_dir_exists(path):
     return False
 
 
+class SpillingLRUCache(LRUCache):
+    """
+    LRU cache of {"df": DataFrame, ...} entries that writes evicted DataFrames to Feather files
+    in spill_dir instead of dropping them; load_spilled(key) reads one back.
+    Eviction only queues the entry: callers guarding the cache with a lock call spill_evicted()
+    after releasing it, so lookups never wait on a disk write. A spill file is deleted once it
+    is read back or the key is replaced (drop_spilled), so the directory only holds frames
+    that are currently evicted.
+    """
+
+    def __init__(self, maxsize, spill_dir):
+        super().__init__(maxsize=maxsize)
+        self.spill_dir = spill_dir
+        # Evicted entries not yet written to disk (still readable through load_spilled)
+        self._evicted = {}
+        self._writing = set()  # keys a spill_evicted() call is currently writing
+        self._evicted_lock = threading.Lock()
+
+    def spill_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.feather")
+
+    def popitem(self):
+        key, entry = super().popitem()
+        with self._evicted_lock:
+            self._evicted[key] = entry
+        return key, entry
+
+    def spill_evicted(self):
+        """Write queued evicted entries to spill_dir."""
+        with self._evicted_lock:
+            pending = [(k, e) for k, e in self._evicted.items() if k not in self._writing]
+            self._writing.update(k for k, _ in pending)
+        for key, entry in pending:
+            path = self.spill_path(key)
+            # Write under a temporary name so readers never see a partial file
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                ensure_dir_exists(self.spill_dir)
+                entry["df"].to_feather(tmp_path)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"⚠️ Could not spill cached DataFrame for {key}: {e}")
+                self._remove(tmp_path)
+                # Dropped, as if it had been evicted from a plain LRU cache
+                with self._evicted_lock:
+                    self._writing.discard(key)
+                    if self._evicted.get(key) is entry:
+                        del self._evicted[key]
+                continue
+            with self._evicted_lock:
+                self._writing.discard(key)
+                if self._evicted.get(key) is entry:
+                    del self._evicted[key]
+                else:
+                    # Reloaded (or replaced) while it was being written; the file is already stale
+                    self._remove(path)
+
+    def load_spilled(self, key):
+        """
+        The DataFrame evicted for key, or None if there is none. A spill file is deleted
+        after it is read, since the caller puts the frame back in the cache.
+        """
+        with self._evicted_lock:
+            entry = self._evicted.pop(key, None)
+        if entry is not None:
+            return entry["df"]
+        path = self.spill_path(key)
+        try:
+            df = pd.read_feather(path)
+        except FileNotFoundError:
+            return None
+        self._remove(path)
+        return df
+
+    def drop_spilled(self, key):
+        """Discard any evicted copy of key, e.g. before storing a re-uploaded file under it."""
+        with self._evicted_lock:
+            self._evicted.pop(key, None)
+        self._remove(self.spill_path(key))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def safe_json_records(records):
+    # Returns a list of dicts with all NaN, inf, -inf replaced with None for JSON serialization.
+    safe = []
+    for row in records:
+        clean_row = {}
+        for k, v in row.items():
+            if isinstance(v, float):
+                if np.isnan(v) or np.isinf(v):
+                    clean_row[k] = None
+                else:
+                    clean_row[k] = float(v)
+            else:
+                clean_row[k] = v
+        safe.append(clean_row)
+    return safe
+
+
+def _clean_floats(values):
+    # One contiguous pass over the float buffer: every non-finite value (inf, -inf, nan) becomes NaN
+    return np.where(np.isfinite(values), values, np.nan)
+
+
+def safe_json_records_df(df):
+    # Same as safe_json_records, but works on the DataFrame directly so the NaN/inf scan runs vectorized.
+    # Only float columns can hold inf, so integer/text columns are left alone.
+    float_cols = [c for c in df.columns if pd.api.types.is_float_dtype(df[c])]
+    if float_cols:
+        df = df.copy()
+        for c in float_cols:
+            df[c] = _clean_floats(df[c].to_numpy(dtype=np.float64, na_value=np.nan))
+    values = df.astype(object).where(pd.notnull(df), None).to_numpy(dtype=object).tolist()
+    # Zipping rows onto the column list skips to_dict's per-column dtype dispatch
+    cols = df.columns.tolist()
+    return [dict(zip(cols, row)) for row in values]
+
+
 def sanitize_text(text):
     """
     A safe wrapper around text cleaning utilities (can extend with your text_conversion.py).
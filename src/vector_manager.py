@@ -1,40 +1,105 @@
-from pinecone import Pinecone, ServerlessSpec
-from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+import threading
+import numpy as np
+from cachetools import TTLCache
+from pinecone import ServerlessSpec
+from pinecone.exceptions import PineconeException
+from pinecone.grpc import PineconeGRPC
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Per-batch retries for transient upsert failures (rate limits, dropped streams)
+UPSERT_RETRIES = 3
+UPSERT_BACKOFF = 0.5  # seconds, doubled after each failed attempt
+
+# Pinecone caps one upsert request at 2 MB; batches are shrunk to stay under it
+MAX_UPSERT_BYTES = 2 * 1024 * 1024
+UPSERT_BATCH_SIZE = 100
+UPSERT_WORKERS = min(8, os.cpu_count() or 4)
+
+# Control-plane lookups (list/describe indexes) are cached per API key, so constructing a
+# VectorDBManager per request or per ingest doesn't pay two round trips each time
+INDEX_CACHE_TTL = 60  # seconds
+_index_names_cache = TTLCache(maxsize=16, ttl=INDEX_CACHE_TTL)
+_index_desc_cache = TTLCache(maxsize=64, ttl=INDEX_CACHE_TTL)
+_index_cache_lock = threading.Lock()
+
+
+def _estimate_vector_bytes(vector):
+    # float32 values on the wire, plus rough id/metadata size
+    return len(vector.get("values", ())) * 4 + len(str(vector.get("id", ""))) + len(str(vector.get("metadata") or ""))
+
+
+def fit_batch_size(vectors, batch_size):
+    """
+    Halve batch_size until a batch of the largest of the first few vectors fits in
+    MAX_UPSERT_BYTES (never below 1).
+    """
+    sample = vectors[:batch_size]
+    if not sample:
+        return batch_size
+    per_vector = max(_estimate_vector_bytes(v) for v in sample)
+    while batch_size > 1 and batch_size * per_vector > MAX_UPSERT_BYTES:
+        batch_size //= 2
+    return batch_size
 
 class VectorDBManager:
-    def __init__(self, api_key, index_name, dimension=1024, metric="cosine"):
+    # Fixed attribute set: no per-instance __dict__
+    __slots__ = ("pc", "index_name", "index", "dimension", "metric", "_api_key", "_executor", "_executor_lock")
+
+    def __init__(self, api_key, index_name, dimension=1024, metric="cosine", on_dimension_mismatch="suffix"):
         """
         Pinecone ke saath vector database manager banata hai.
         Index ko create karega agar exist nahi karta ho.
+        on_dimension_mismatch decides what happens if index_name exists with another dimension:
+          - "suffix": use (and create if needed) '<index_name>-<dimension>' instead
+          - "error": raise ValueError
+          - "recreate": delete the existing index and create it again with this dimension
         """
-        self.pc = Pinecone(api_key=api_key)
+        if on_dimension_mismatch not in ("error", "suffix", "recreate"):
+            raise ValueError("on_dimension_mismatch must be 'error', 'suffix' or 'recreate'")
+
+        # gRPC client: upserts travel as protobuf over one multiplexed HTTP/2 channel
+        self.pc = PineconeGRPC(api_key=api_key)
         self.index_name = index_name
+        self.dimension = dimension
+        self.metric = metric
+        self._api_key = api_key
+        # Thread pool for upsert_vectors_async, created on first use and reused across calls
+        self._executor = None
+        self._executor_lock = threading.Lock()
 
         # Sab indexes ka list nikaalo
-        existing_indexes = [i.name for i in self.pc.list_indexes()]
+        existing_indexes = self._index_names()
 
         target_index = self.index_name
         needs_create = False
 
         if target_index in existing_indexes:
             print(f"✅ Index '{target_index}' already exists!")
-            # Try to detect dimension mismatch and transparently switch to a dimension-suffixed index
+            existing_dim = None
             try:
-                desc = self.pc.describe_index(target_index)
+                desc = self._describe_index(target_index)
                 existing_dim = getattr(desc, "dimension", None) or getattr(desc, "config", {}).get("dimension")
-                if existing_dim and int(existing_dim) != int(dimension):
+            except Exception:
+                # If describe fails, fall back to using requested name
+                pass
+            if existing_dim and int(existing_dim) != int(dimension):
+                msg = f"Index dimension mismatch: existing={existing_dim}, required={dimension}."
+                if on_dimension_mismatch == "error":
+                    raise ValueError(f"{msg} Index: '{target_index}'")
+                if on_dimension_mismatch == "recreate":
+                    print(f"⚠️ {msg} Recreating '{target_index}'.")
+                    self.pc.delete_index(target_index)
+                    self.refresh()
+                    needs_create = True
+                else:
                     suggested = f"{target_index}-{dimension}"
-                    print(
-                        f"⚠️ Index dimension mismatch: existing={existing_dim}, required={dimension}. "
-                        f"Will use '{suggested}' instead."
-                    )
+                    print(f"⚠️ {msg} Will use '{suggested}' instead.")
                     target_index = suggested
                     if target_index not in existing_indexes:
                         needs_create = True
-                # else: ok to use existing index
-            except Exception:
-                # If describe fails, fall back to using requested name; will create if needed
-                pass
+            # else: ok to use existing index
         else:
             needs_create = True
 
@@ -49,6 +114,7 @@ class VectorDBManager:
                     region="us-east-1"
                 )
             )
+            self.refresh()
 
         # Ensure we use the final resolved index name
         self.index_name = target_index
@@ -56,24 +122,161 @@ class VectorDBManager:
         # Index attach karo
         self.index = self.pc.Index(self.index_name)
 
-    def upsert_vectors(self, vectors, namespace="default", batch_size=20, max_workers=4):
+    def _index_names(self):
+        """Names of the account's indexes, cached for INDEX_CACHE_TTL seconds."""
+        with _index_cache_lock:
+            names = _index_names_cache.get(self._api_key)
+        if names is None:
+            names = frozenset(i.name for i in self.pc.list_indexes())
+            with _index_cache_lock:
+                _index_names_cache[self._api_key] = names
+        return names
+
+    def _describe_index(self, name):
+        """describe_index(name), cached for INDEX_CACHE_TTL seconds."""
+        key = (self._api_key, name)
+        with _index_cache_lock:
+            desc = _index_desc_cache.get(key)
+        if desc is None:
+            desc = self.pc.describe_index(name)
+            with _index_cache_lock:
+                _index_desc_cache[key] = desc
+        return desc
+
+    def refresh(self):
+        """Drop this account's cached index list/descriptions, e.g. after creating or deleting an index."""
+        with _index_cache_lock:
+            _index_names_cache.pop(self._api_key, None)
+            for key in [k for k in _index_desc_cache if k[0] == self._api_key]:
+                _index_desc_cache.pop(key, None)
+
+    def upsert_vectors(self, vectors, namespace="default", batch_size=UPSERT_BATCH_SIZE, max_workers=UPSERT_WORKERS,
+                       _dry_run=False):
         """
         Upload embeddings to Pinecone in parallel batches to improve speed.
+        Failed batches are retried with exponential backoff; a batch that still fails
+        after UPSERT_RETRIES retries raises once the other batches have finished.
         Args:
             vectors: list of dicts [{id, values, metadata}]
             namespace: Pinecone namespace string
-            batch_size: number of vectors per batch
+            batch_size: number of vectors per batch (lowered if a batch would exceed MAX_UPSERT_BYTES)
             max_workers: number of parallel upsert threads
+            _dry_run: return the batch sizes without uploading (for testing)
+        Returns:
+            list with the number of vectors upserted per batch, in batch order
         """
         n = len(vectors)
+        batch_size = fit_batch_size(vectors, batch_size)
+        print(f"📦 Upserting {n} vectors: batch_size={batch_size}, max_workers={max_workers}")
         batches = [vectors[i:i + batch_size] for i in range(0, n, batch_size)]
+        if _dry_run:
+            return [len(batch) for batch in batches]
 
-        def upsert_batch(batch):
-            self.index.upsert(vectors=batch, namespace=namespace)
-            print(f"✅ Batch upserted {len(batch)} vectors into '{self.index_name}' [namespace={namespace}]")
+        return self._run_batches(lambda batch: self._upsert_batch(batch, namespace), batches, max_workers)
 
+    def upsert_matrix(self, ids, emb, metadatas, namespace="default", batch_size=UPSERT_BATCH_SIZE,
+                      max_workers=UPSERT_WORKERS):
+        """
+        Upsert embeddings held as one matrix instead of a list of vector dicts.
+        Args:
+            ids: list of vector ids, one per row of emb
+            emb: float32 C-contiguous array of shape (len(ids), dimension)
+            metadatas: list of metadata dicts, one per row of emb
+        Each worker builds its batch's {id, values, metadata} records only when it runs, with
+        values as row views of emb, so no per-vector float lists exist ahead of the upload.
+        Returns:
+            list with the number of vectors upserted per batch, in batch order
+        """
+        if emb.dtype != np.float32 or not emb.flags["C_CONTIGUOUS"]:
+            raise ValueError("emb must be a C-contiguous float32 array")
+        if not len(ids) == len(emb) == len(metadatas):
+            raise ValueError("ids, emb and metadatas must have the same length")
+        sample = [{"id": ids[j], "values": emb[j], "metadata": metadatas[j]} for j in range(min(batch_size, len(ids)))]
+        batch_size = fit_batch_size(sample, batch_size)
+
+        def upsert_rows(start):
+            stop = min(start + batch_size, len(ids))
+            batch = [
+                {"id": ids[j], "values": emb[j], "metadata": metadatas[j]}
+                for j in range(start, stop)
+            ]
+            return self._upsert_batch(batch, namespace)
+
+        return self._run_batches(upsert_rows, range(0, len(ids), batch_size), max_workers)
+
+    def _upsert_batch(self, batch, namespace):
+        """Upsert one batch, retrying PineconeException with exponential backoff."""
+        for attempt in range(UPSERT_RETRIES + 1):
+            try:
+                self.index.upsert(vectors=batch, namespace=namespace)
+                break
+            except PineconeException as e:
+                if attempt == UPSERT_RETRIES:
+                    raise
+                delay = UPSERT_BACKOFF * (2 ** attempt)
+                print(f"⚠️ Upsert of {len(batch)} vectors failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+        print(f"✅ Batch upserted {len(batch)} vectors into '{self.index_name}' [namespace={namespace}]")
+        return len(batch)
+
+    @staticmethod
+    def _run_batches(fn, batches, max_workers):
+        """
+        Run fn over batches in a thread pool; returns fn's results in batch order.
+        A failing batch re-raises once the other batches have finished.
+        """
+        batches = list(batches)
+        results = [0] * len(batches)
+        errors = []
+        # All threads share self.index, i.e. one gRPC channel; results are taken as they
+        # complete so one slow batch doesn't hold up reporting (or errors) for the rest
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            executor.map(upsert_batch, batches)
+            futures = {executor.submit(fn, batch): i for i, batch in enumerate(batches)}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+        return results
+
+    def _upsert_executor(self, workers):
+        """The manager's upsert thread pool; `workers` sizes it when the first call creates it."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pinecone-upsert")
+        return self._executor
+
+    def close(self):
+        """Wait for queued async upserts to finish and shut down the upsert thread pool."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def upsert_vectors_async(self, vectors, namespace="default", batch_size=UPSERT_BATCH_SIZE, workers=UPSERT_WORKERS):
+        """
+        Submit upserts in parallel batches and return immediately, so the caller can
+        overlap other work with the uploads. Batches from every call share one thread pool.
+        Args:
+            vectors: list of dicts [{id, values, metadata}]; values may be numpy float32 rows
+                (e.g. views into one embedding matrix). Pass them as-is: the gRPC client unboxes
+                arrays in C when packing the protobuf request, so building Python float lists
+                first only adds a copy.
+            workers: size of the shared thread pool. Only the call that creates the pool uses it;
+                later calls reuse the existing pool and ignore this value.
+        Returns:
+            list of concurrent.futures.Future, one per batch; .result() is the batch's vector count
+            and raises if the batch still failed after UPSERT_RETRIES retries
+        """
+        batch_size = fit_batch_size(vectors, batch_size)
+        executor = self._upsert_executor(workers)
+        return [
+            executor.submit(self._upsert_batch, vectors[i:i + batch_size], namespace)
+            for i in range(0, len(vectors), batch_size)
+        ]
 
     def query(self, vector, top_k=5, namespace="default"):
         """
@@ -1,5 +1,14 @@
+import threading
+import weakref
 import pandas as pd
 import plotly.express as px
+from cachetools import LRUCache
+
+# Summed groupbys keyed on (id(df), group_col, value_col), so dashboard rerenders of the
+# same frame skip the aggregation. Entries hold a weakref to their frame to detect id reuse.
+AGG_CACHE_SIZE = 64
+_agg_cache = LRUCache(maxsize=AGG_CACHE_SIZE)
+_agg_lock = threading.Lock()
 
 def to_dataframe(data):
     if isinstance(data, pd.DataFrame):
@@ -10,37 +19,68 @@ def to_dataframe(data):
         return pd.DataFrame()
 
 def detect_column_types(df):
-    types = {"numerical": [], "categorical": [], "datetime": []}
-    for col in df.columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
-            types["numerical"].append(col)
-        elif pd.api.types.is_datetime64_any_dtype(df[col]):
-            types["datetime"].append(col)
-        else:
-            types["categorical"].append(col)
-    return types
-
-def plot_sales_trend(df, date_col, value_col):
-    return px.line(df.groupby(date_col)[value_col].sum().reset_index(),
-                   x=date_col, y=value_col, title=f"{value_col} Trend Over Time")
-
-def plot_categorical_breakdown(df, cat_col, value_col):
-    agg = df.groupby(cat_col)[value_col].sum().reset_index()
+    # Classify from df.dtypes directly instead of pulling each column out of the frame
+    dtypes = df.dtypes
+    num = dtypes.map(pd.api.types.is_numeric_dtype).to_numpy(dtype=bool)
+    dt = dtypes.map(pd.api.types.is_datetime64_any_dtype).to_numpy(dtype=bool)
+    return {
+        "numerical": dtypes.index[num].tolist(),
+        "categorical": dtypes.index[~(num | dt)].tolist(),
+        "datetime": dtypes.index[dt].tolist(),
+    }
+
+def schema_types(df, column_types=None):
+    """
+    Per-column labels ("numeric" / "datetime" / "categorical") for API responses, derived from
+    detect_column_types so they agree with the plotting code on NumPy- and Arrow-backed frames.
+    Pass column_types if detect_column_types(df) was already computed.
+    """
+    if column_types is None:
+        column_types = detect_column_types(df)
+    labels = dict.fromkeys(column_types["numerical"], "numeric")
+    labels.update(dict.fromkeys(column_types["datetime"], "datetime"))
+    return {c: labels.get(c, "categorical") for c in df.columns}
+
+def _agg(df, group_col, value_col):
+    """df.groupby(group_col)[value_col].sum().reset_index(), cached per frame."""
+    key = (id(df), group_col, value_col)
+    with _agg_lock:
+        hit = _agg_cache.get(key)
+    if hit is not None and hit[0]() is df:
+        return hit[1]
+    agg = df.groupby(group_col)[value_col].sum().reset_index()
+    with _agg_lock:
+        _agg_cache[key] = (weakref.ref(df), agg)
+    return agg
+
+def plot_sales_trend(df, date_col, value_col, agg=None):
+    if agg is None:
+        agg = _agg(df, date_col, value_col)
+    return px.line(agg, x=date_col, y=value_col, title=f"{value_col} Trend Over Time")
+
+def plot_categorical_breakdown(df, cat_col, value_col, agg=None):
+    if agg is None:
+        agg = _agg(df, cat_col, value_col)
     return px.bar(agg, x=cat_col, y=value_col, title=f"{value_col} by {cat_col}")
 
-def plot_pie_chart(df, cat_col, value_col):
-    agg = df.groupby(cat_col)[value_col].sum().reset_index()
+def plot_pie_chart(df, cat_col, value_col, agg=None):
+    if agg is None:
+        agg = _agg(df, cat_col, value_col)
     return px.pie(agg, names=cat_col, values=value_col, title=f"{value_col} Share by {cat_col}")
 
 def recommend_visualizations(df, max_charts=3):
     types = detect_column_types(df)
     visuals = []
     if types["datetime"] and types["numerical"]:
-        visuals.append(plot_sales_trend(df, types["datetime"][0], types["numerical"][0]))
+        date_col, value_col = types["datetime"][0], types["numerical"][0]
+        visuals.append(plot_sales_trend(df, date_col, value_col, agg=_agg(df, date_col, value_col)))
 
     if types["categorical"] and types["numerical"]:
-        visuals.append(plot_categorical_breakdown(df, types["categorical"][0], types["numerical"][0]))
-        visuals.append(plot_pie_chart(df, types["categorical"][0], types["numerical"][0]))
+        # Bar and pie show the same totals; aggregate once for both
+        cat_col, value_col = types["categorical"][0], types["numerical"][0]
+        cat_agg = _agg(df, cat_col, value_col)
+        visuals.append(plot_categorical_breakdown(df, cat_col, value_col, agg=cat_agg))
+        visuals.append(plot_pie_chart(df, cat_col, value_col, agg=cat_agg))
 
     return visuals[:max_charts]
 